@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import Any
 
@@ -29,6 +30,16 @@ from app.services.document_dynamodb_service import document_service
 router = APIRouter()
 
 
+async def _upload_size(file: UploadFile) -> int:
+    """Get an upload's size without reading it into memory"""
+    if file.size is not None:
+        return file.size
+    # Seek to the end of the spooled file instead of reading it
+    size = await asyncio.to_thread(file.file.seek, 0, os.SEEK_END)
+    await file.seek(0)
+    return size
+
+
 @router.post("", response_model=Document)
 async def create_document(
     *,
@@ -51,10 +62,7 @@ async def create_document(
     os.makedirs(settings.UPLOAD_FOLDER, exist_ok=True)
 
     # Check file size
-    file_size = 0
-    contents = await file.read()
-    file_size = len(contents)
-    await file.seek(0)
+    file_size = await _upload_size(file)
 
     if file_size > settings.MAX_CONTENT_LENGTH:
         raise HTTPException(
@@ -78,7 +86,6 @@ async def create_document(
     document = await document_service.create_with_file(
         obj_in=document_in,
         file=file,
-        file_content=contents,
         file_size=file_size,
         owner_id=current_user.id,
     )
@@ -261,7 +268,7 @@ async def download_document(
     file_path = document.file_path
 
     # Try to get a presigned URL (for S3)
-    download_url = document_service.get_download_url(file_path)
+    download_url = await document_service.get_download_url(file_path)
 
     if stream:
         if download_url:
@@ -316,10 +323,7 @@ async def upload_new_version(
             )
 
     # Check file size
-    file_size = 0
-    contents = await file.read()
-    file_size = len(contents)
-    await file.seek(0)
+    file_size = await _upload_size(file)
 
     if file_size > settings.MAX_CONTENT_LENGTH:
         raise HTTPException(
@@ -330,7 +334,6 @@ async def upload_new_version(
     version = await document_service.create_version(
         document_id=id,
         file=file,
-        file_content=contents,
         file_size=file_size,
         user_id=current_user.id,
     )
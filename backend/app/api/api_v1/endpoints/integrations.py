@@ -1,3 +1,4 @@
+import asyncio
 import json
 import uuid
 from datetime import UTC
@@ -9,9 +10,9 @@ from fastapi.responses import RedirectResponse
 from app.api.deps import get_current_user, get_db
 from app.core.config import settings
 from app.db.dynamodb_session import DynamoDBSession
+from app.models.integration import ExternalIntegration
 from app.models.user import User
 from app.schemas.integration import (
-    ExternalIntegration,
     ExternalIntegrationCreate,
     GoogleDriveAuthState,
     GoogleDriveFile,
@@ -23,6 +24,27 @@ from app.services.integration import google_drive_service, integration_service
 router = APIRouter()
 
 
+async def _get_drive_integration(
+    db: DynamoDBSession, user_id: str
+) -> ExternalIntegration:
+    """Get the user's Google Drive integration, preferring one with a live token"""
+    integration = await integration_service.get_active_by_user_and_provider(
+        db, user_id, "google_drive"
+    )
+    if not integration:
+        # Expired (or legacy) tokens go through the Drive calls' refresh path
+        integration = await integration_service.get_by_user_and_provider(
+            db, user_id, "google_drive"
+        )
+
+    if not integration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Google Drive integration not found. Please connect your account first.",
+        )
+    return integration
+
+
 @router.post("/google/link", status_code=status.HTTP_200_OK)
 async def start_google_drive_link(
     *,
@@ -248,39 +270,45 @@ async def list_google_drive_files(
     """
     List files from Google Drive
     """
-    integration = await integration_service.get_by_user_and_provider(
-        db, current_user.id, "google_drive"
-    )
-
-    if not integration:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Google Drive integration not found. Please connect your account first.",
-        )
-
-    try:
-        files, next_page_token = await google_drive_service.list_files(
-            db, integration, folder_id, page_token, page_size
-        )
+    integration = await _get_drive_integration(db, current_user.id)
 
+    async def folder_context() -> tuple[GoogleDriveFile | None, list[GoogleDriveFile]]:
         # Get current folder metadata if a folder_id is provided
         current_folder = None
-        parent_folders = []
-        if folder_id:
-            try:
-                current_folder = await google_drive_service.get_file_metadata(
-                    db, integration, folder_id
+        if not folder_id:
+            return current_folder, []
+        try:
+            current_folder = await google_drive_service.get_file_metadata(
+                db, integration, folder_id
+            )
+
+            # If the current folder has parents, get the parent folder metadata
+            if current_folder.parents and current_folder.parents[0]:
+                parent_folder = await google_drive_service.get_file_metadata(
+                    db, integration, current_folder.parents[0]
                 )
+                return current_folder, [parent_folder]
+        except Exception as folder_error:
+            print(f"Error fetching folder metadata: {str(folder_error)}")
+            # Continue even if folder metadata cannot be fetched
+        return current_folder, []
 
-                # If the current folder has parents, get the parent folder metadata
-                if current_folder.parents and current_folder.parents[0]:
-                    parent_folder = await google_drive_service.get_file_metadata(
-                        db, integration, current_folder.parents[0]
-                    )
-                    parent_folders = [parent_folder]
-            except Exception as folder_error:
-                print(f"Error fetching folder metadata: {str(folder_error)}")
-                # Continue even if folder metadata cannot be fetched
+    try:
+        # Refresh once up front so the concurrent calls below don't each see
+        # an expired token and refresh it again
+        integration = await google_drive_service.ensure_fresh_token(db, integration)
+
+        # The listing and the folder metadata are independent Drive calls; the
+        # task group cancels the other one if either fails
+        async with asyncio.TaskGroup() as tg:
+            listing = tg.create_task(
+                google_drive_service.list_files(
+                    db, integration, folder_id, page_token, page_size
+                )
+            )
+            context = tg.create_task(folder_context())
+        files, next_page_token = listing.result()
+        current_folder, parent_folders = context.result()
 
         return {
             "files": files,
@@ -289,10 +317,10 @@ async def list_google_drive_files(
             "parent_folders": parent_folders,
             "is_root": folder_id is None,
         }
-    except Exception as e:
+    except* Exception as eg:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching Google Drive files: {str(e)}",
+            detail=f"Error fetching Google Drive files: {str(eg.exceptions[0])}",
         )
 
 
@@ -306,15 +334,7 @@ async def get_google_drive_file(
     """
     Get a specific Google Drive file's metadata
     """
-    integration = await integration_service.get_by_user_and_provider(
-        db, current_user.id, "google_drive"
-    )
-
-    if not integration:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Google Drive integration not found. Please connect your account first.",
-        )
+    integration = await _get_drive_integration(db, current_user.id)
 
     try:
         file_metadata = await google_drive_service.get_file_metadata(
@@ -338,15 +358,7 @@ async def import_google_drive_files(
     """
     Import files from Google Drive into the data room
     """
-    integration = await integration_service.get_by_user_and_provider(
-        db, current_user.id, "google_drive"
-    )
-
-    if not integration:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Google Drive integration not found. Please connect your account first.",
-        )
+    integration = await _get_drive_integration(db, current_user.id)
 
     try:
         imported_document_ids = []
@@ -422,15 +434,7 @@ async def get_google_drive_storage(
     """
     Get Google Drive storage usage information
     """
-    integration = await integration_service.get_by_user_and_provider(
-        db, current_user.id, "google_drive"
-    )
-
-    if not integration:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Google Drive integration not found. Please connect your account first.",
-        )
+    integration = await _get_drive_integration(db, current_user.id)
 
     try:
         storage_info = await google_drive_service.get_storage_usage(db, integration)
@@ -454,15 +458,7 @@ async def search_google_drive(
     """
     Search for files in Google Drive
     """
-    integration = await integration_service.get_by_user_and_provider(
-        db, current_user.id, "google_drive"
-    )
-
-    if not integration:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Google Drive integration not found. Please connect your account first.",
-        )
+    integration = await _get_drive_integration(db, current_user.id)
 
     try:
         files, next_page_token = await google_drive_service.search_files(
@@ -8,6 +8,7 @@ from app.core.security import ALGORITHM
 from app.db.dynamodb_session import DynamoDBSession, get_db
 from app.models.user import User
 from app.schemas.token import TokenPayload
+from app.services.user import user_service
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -38,11 +39,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Use DynamoDB to retrieve user by ID
-    table = db.dynamodb.Table(db.tables.get("users"))
-    response = table.get_item(Key={"id": token_data.sub})
-    user_data = response.get("Item")
-    user = User(**user_data) if user_data else None
+    user = await user_service.get(db, id=token_data.sub)
 
     if not user:
         raise HTTPException(
@@ -101,6 +101,17 @@ class Settings(BaseSettings):
     MAX_DOCUMENT_IMPORT_STORAGE_MB: int = 500  # 500 MB
     MAX_DOCUMENT_IMPORT_STORAGE_BYTES: int = 500 * 1024 * 1024
 
+    # Thread pool for blocking client calls (Google Drive, password hashing)
+    WORKER_THREADS: int = 32
+
+    # Per-process cache for user lookups
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10_000
+
+    # Per-process cache for integration lookups by user and provider
+    INTEGRATION_CACHE_TTL_SECONDS: int = 60
+    INTEGRATION_CACHE_MAX_SIZE: int = 10_000
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,3 +1,4 @@
+import hashlib
 import uuid
 from datetime import datetime, timedelta
 from typing import Any
@@ -49,8 +50,6 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         True if password matches hash, False otherwise
     """
     # Using a simple hash verification to match our get_password_hash function
-    import hashlib
-
     if hashed_password.startswith("sha256$"):
         expected_hash = "sha256$" + hashlib.sha256(plain_password.encode()).hexdigest()
         return hashed_password == expected_hash
@@ -69,8 +68,6 @@ def get_password_hash(password: str) -> str:
         Hashed password
     """
     # Using a simple hash function to avoid dependency issues
-    import hashlib
-
     return "sha256$" + hashlib.sha256(password.encode()).hexdigest()
 
 
@@ -5,10 +5,12 @@ Allowing for a smoother transition from SQL to NoSQL.
 """
 
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from uuid import uuid4
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from app.core.config import settings
@@ -17,6 +19,35 @@ from app.db.base_class import Base
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+@lru_cache(maxsize=4)
+def _get_dynamodb_resource(
+    region_name: str,
+    aws_access_key_id: str | None,
+    aws_secret_access_key: str | None,
+    aws_session_token: str | None,
+    endpoint_url: str | None,
+):
+    """Create one DynamoDB resource per distinct AWS configuration and reuse it"""
+    dynamodb_kwargs = {
+        "region_name": region_name,
+        # Keep HTTP connections open across requests
+        "config": Config(max_pool_connections=50, tcp_keepalive=True),
+    }
+
+    # Add AWS credentials if provided
+    if aws_access_key_id and aws_secret_access_key:
+        dynamodb_kwargs["aws_access_key_id"] = aws_access_key_id
+        dynamodb_kwargs["aws_secret_access_key"] = aws_secret_access_key
+        if aws_session_token:
+            dynamodb_kwargs["aws_session_token"] = aws_session_token
+
+    # Add endpoint URL if provided (for local DynamoDB)
+    if endpoint_url:
+        dynamodb_kwargs["endpoint_url"] = endpoint_url
+
+    return boto3.resource("dynamodb", **dynamodb_kwargs)
+
+
 class DynamoDBSession:
     """
     Simulates an AsyncSession but uses DynamoDB.
@@ -25,21 +56,14 @@ class DynamoDBSession:
 
     def __init__(self):
         """Initialize DynamoDB resources"""
-        # Configure DynamoDB client with optional credentials
-        dynamodb_kwargs = {"region_name": settings.AWS_REGION}
-
-        # Add AWS credentials if provided
-        if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
-            dynamodb_kwargs["aws_access_key_id"] = settings.AWS_ACCESS_KEY_ID
-            dynamodb_kwargs["aws_secret_access_key"] = settings.AWS_SECRET_ACCESS_KEY
-            if settings.AWS_SESSION_TOKEN:
-                dynamodb_kwargs["aws_session_token"] = settings.AWS_SESSION_TOKEN
-
-        # Add endpoint URL if provided (for local DynamoDB)
-        if settings.AWS_ENDPOINT_URL:
-            dynamodb_kwargs["endpoint_url"] = settings.AWS_ENDPOINT_URL
-
-        self.dynamodb = boto3.resource("dynamodb", **dynamodb_kwargs)
+        # Sessions are created per request; the resource underneath is shared
+        self.dynamodb = _get_dynamodb_resource(
+            settings.AWS_REGION,
+            settings.AWS_ACCESS_KEY_ID,
+            settings.AWS_SECRET_ACCESS_KEY,
+            settings.AWS_SESSION_TOKEN,
+            settings.AWS_ENDPOINT_URL,
+        )
 
         # Map tables with their environment variable names
         self.tables = {
@@ -1,3 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -11,6 +15,15 @@ from app.core.middleware import setup_middleware
 from app.db.dynamodb_session import DynamoDBSession
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the default executor used by asyncio.to_thread"""
+    executor = ThreadPoolExecutor(max_workers=settings.WORKER_THREADS)
+    asyncio.get_running_loop().set_default_executor(executor)
+    yield
+    executor.shutdown(wait=False)
+
+
 def create_application() -> FastAPI:
     """Create and configure the FastAPI application."""
     # Initialize logging
@@ -23,6 +36,7 @@ def create_application() -> FastAPI:
         version="1.0.0",
         docs_url=None if settings.ENVIRONMENT == "production" else "/docs",
         redoc_url=None if settings.ENVIRONMENT == "production" else "/redoc",
+        lifespan=lifespan,
     )
 
     # Setup exception handlers
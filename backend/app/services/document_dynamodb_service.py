@@ -3,12 +3,15 @@ Document service using DynamoDB for data storage.
 This replaces the SQLAlchemy-based document service.
 """
 
+import asyncio
 import logging
 import mimetypes
 import os
+import shutil
 from datetime import datetime
 from typing import List, Optional
 
+from botocore.exceptions import ClientError
 from fastapi import UploadFile
 
 from app.core.config import settings
@@ -21,52 +24,12 @@ from app.schemas.document import (
     DocumentUpdate,
 )
 from app.services.dynamodb_service import DynamoDBService
+from app.utils.storage_factory import COPY_CHUNK_SIZE
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 
-class FileSystemStorage:
-    """Local filesystem storage adapter.
-    Used for local development and testing.
-    """
-
-    def __init__(self, upload_folder: str = None):
-        """Initialize with upload folder path."""
-        self.upload_folder = upload_folder or settings.UPLOAD_FOLDER
-        # Ensure upload folder exists
-        os.makedirs(self.upload_folder, exist_ok=True)
-
-    async def save_file(self, file: UploadFile, filename: str | None = None) -> str:
-        """Save file to local filesystem."""
-        if not filename:
-            filename = file.filename
-
-        file_path = os.path.join(self.upload_folder, filename)
-
-        # Save file to disk - using async file operations
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-
-        return file_path
-
-    async def delete_file(self, filename: str) -> bool:
-        """Delete file from local filesystem."""
-        file_path = os.path.join(self.upload_folder, filename)
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Deleted file: {file_path}")
-                return True
-            else:
-                logger.warning(f"File not found during deletion: {file_path}")
-                return True  # Return True if file doesn't exist (already deleted)
-        except Exception as e:
-            logger.error(f"Error deleting file {file_path}: {str(e)}")
-            return False
-
-
 class DocumentDynamoDBService(
     DynamoDBService[Document, DocumentCreate, DocumentUpdate]
 ):
@@ -100,11 +63,11 @@ class DocumentDynamoDBService(
             logger.error(f"Error deleting file {file_path}: {str(e)}")
             return False
 
-    def get_download_url(self, file_path: str) -> str | None:
+    async def get_download_url(self, file_path: str) -> str | None:
         """Get a download URL for the file (e.g., presigned S3 URL)"""
         # Extract filename from path
         filename = os.path.basename(file_path)
-        return self.storage.get_presigned_url(filename)
+        return await self.storage.get_presigned_url(filename)
 
     async def get_multi_by_owner(
         self,
@@ -160,14 +123,24 @@ class DocumentDynamoDBService(
 
         return documents
 
+    @staticmethod
+    def _copy_to_path(source, file_path: str) -> None:
+        """Copy a file object to disk in chunks"""
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(source, f, length=COPY_CHUNK_SIZE)
+
     async def save_content(
         self, content: bytes, filename: str, content_type: str = None
     ) -> str:
         """Save content using the storage provider"""
         return await self.storage.save_content(content, filename, content_type)
 
-    async def create_document(
-        self,
+    async def delete_content(self, file_path: str) -> bool:
+        """Delete content saved with save_content"""
+        return await self._delete_file_from_filesystem(file_path)
+
+    @staticmethod
+    def _build_document_records(
         *,
         user_id: str,
         name: str,
@@ -177,10 +150,11 @@ class DocumentDynamoDBService(
         file_size: int,
         folder_id: str = None,
         is_public: bool = False,
-    ) -> str:
-        """Create a document from an existing file"""
+    ) -> tuple[dict, dict]:
+        """Build the document item and its initial version item"""
         # Generate unique ID
         doc_id = generate_uuid()
+        now = datetime.now().isoformat()
 
         # Create document record
         document_data = {
@@ -194,13 +168,10 @@ class DocumentDynamoDBService(
             "owner_id": user_id,
             "is_public": is_public,
             "is_deleted": False,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
         }
 
-        document = Document.from_dict(document_data)
-        await self.create(document_data)
-
         # Create initial version
         version_data = {
             "id": generate_uuid(),
@@ -209,18 +180,75 @@ class DocumentDynamoDBService(
             "file_path": file_path,
             "file_size": file_size,
             "created_by": user_id,
-            "created_at": datetime.now().isoformat(),
+            "created_at": now,
         }
 
+        return document_data, version_data
+
+    async def create_document(
+        self,
+        *,
+        user_id: str,
+        name: str,
+        description: str,
+        file_path: str,
+        file_type: str,
+        file_size: int,
+        folder_id: str = None,
+        is_public: bool = False,
+    ) -> str:
+        """Create a document from an existing file"""
+        document_data, version_data = self._build_document_records(
+            user_id=user_id,
+            name=name,
+            description=description,
+            file_path=file_path,
+            file_type=file_type,
+            file_size=file_size,
+            folder_id=folder_id,
+            is_public=is_public,
+        )
+
+        await self.create(document_data)
         await self.document_version_service.create(version_data)
 
-        return doc_id
+        return document_data["id"]
+
+    def _write_document_records(self, records: list[tuple[dict, dict]]) -> None:
+        """Write document and version items with BatchWriteItem"""
+        with self.table.batch_writer() as batch:
+            for document_data, _ in records:
+                batch.put_item(Item=Document.from_dict(document_data).to_dict())
+
+        with self.document_version_service.table.batch_writer() as batch:
+            for _, version_data in records:
+                batch.put_item(Item=DocumentVersion.from_dict(version_data).to_dict())
+
+    async def create_documents(self, documents: list[dict]) -> list[str]:
+        """Create many documents from existing files using batched writes
+
+        Each entry takes the same keyword arguments as create_document. Document
+        and version items are written with BatchWriteItem instead of one
+        PutItem round trip per record.
+
+        Returns:
+            list[str]: IDs of the created documents, in input order
+        """
+        records = [self._build_document_records(**document) for document in documents]
+
+        try:
+            # The batch writer blocks on every flush, so run it in a thread
+            await asyncio.to_thread(self._write_document_records, records)
+        except ClientError as e:
+            logger.error(f"Error batch creating documents in DynamoDB: {str(e)}")
+            raise
+
+        return [document_data["id"] for document_data, _ in records]
 
     async def create_with_file(
         self,
         obj_in: DocumentCreate,
         file: UploadFile,
-        file_content: bytes,
         file_size: int,
         owner_id: str,
     ) -> Document:
@@ -230,9 +258,9 @@ class DocumentDynamoDBService(
         extension = os.path.splitext(file.filename)[1] if file.filename else ""
         file_path = os.path.join(settings.get_upload_path(), f"{doc_id}{extension}")
 
-        # Save file to disk
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        # Stream file to disk without blocking the event loop
+        await file.seek(0)
+        await asyncio.to_thread(self._copy_to_path, file.file, file_path)
 
         # Detect file type
         file_type = (
@@ -276,7 +304,6 @@ class DocumentDynamoDBService(
         self,
         document_id: str,
         file: UploadFile,
-        file_content: bytes,
         file_size: int,
         user_id: str,
     ) -> DocumentVersion:
@@ -299,9 +326,9 @@ class DocumentDynamoDBService(
             settings.get_upload_path(), f"{document_id}_v{version_number}{extension}"
         )
 
-        # Save file to disk
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        # Stream file to disk without blocking the event loop
+        await file.seek(0)
+        await asyncio.to_thread(self._copy_to_path, file.file, file_path)
 
         # Create version record
         version_data = {
@@ -1,20 +1,26 @@
+import asyncio
 import hashlib
 import io
 import json
 import logging
 import os
+import random
+import time
 import uuid
 from datetime import UTC, datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
 
 import aiohttp
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.db.dynamodb_session import DynamoDBSession
 from app.models.integration import ExternalIntegration
 from app.schemas.integration import (
     ExternalIntegrationCreate,
@@ -23,6 +29,7 @@ from app.schemas.integration import (
 )
 from app.services.base import BaseService
 from app.services.document_dynamodb_service import document_service
+from app.utils.cache import TTLCache
 
 
 # Helper function to ensure datetime objects have timezone information
@@ -42,10 +49,138 @@ def ensure_timezone_aware(dt):
     return dt
 
 
+def _escape_query_value(value: str) -> str:
+    """Escape a value for use inside a single-quoted Drive query string"""
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def _parse_drive_ts(value: str | None) -> datetime | None:
+    """Parse a Drive RFC 3339 timestamp (always UTC, e.g. 2023-01-01T12:00:00.000Z)"""
+    return datetime.fromisoformat(value) if value else None
+
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# OAuth scope string is fixed for the lifetime of the process
+_SCOPES = " ".join(settings.GOOGLE_AUTH_SCOPES)
+
+# Fields requested for single-file metadata lookups
+FILE_METADATA_FIELDS = "id, name, mimeType, size, webViewLink, webContentLink, thumbnailLink, md5Checksum, modifiedTime, createdTime, parents, exportLinks"
+
+# Maximum number of sub-requests allowed in one Drive batch call
+DRIVE_BATCH_LIMIT = 100
+
+# Files downloaded at the same time while importing a folder
+IMPORT_DOWNLOAD_CONCURRENCY = 4
+
+# Export format (mime type, extension) for Google Workspace documents
+_GDOC_EXPORT: dict[str, tuple[str, str]] = {
+    "application/vnd.google-apps.document": ("application/pdf", ".pdf"),
+    "application/vnd.google-apps.spreadsheet": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        ".xlsx",
+    ),
+    "application/vnd.google-apps.presentation": (
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        ".pptx",
+    ),
+    "application/vnd.google-apps.drawing": ("image/png", ".png"),
+}
+# Default to PDF for other Google Workspace documents
+_GDOC_DEFAULT_EXPORT = ("application/pdf", ".pdf")
+
+
+class DriveRateLimiter:
+    """Token-bucket limiter with exponential backoff for Google Drive requests
+
+    Every Drive request waits for a token before it is sent. Requests rejected
+    with 429, 5xx or a 403 rate-limit reason are retried after the delay in
+    the Retry-After header, or an exponential backoff with jitter.
+    """
+
+    RATE_LIMIT_REASONS = {"userRateLimitExceeded", "rateLimitExceeded"}
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        capacity: int = 10,
+        max_retries: int = 5,
+        max_backoff: float = 32.0,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        # Reserve a token up front; a negative balance is the wait still owed
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+    def _is_retryable(self, error: HttpError) -> bool:
+        """Check whether a Drive error is a transient or rate-limit failure"""
+        status = error.resp.status
+        if status == 429 or status >= 500:
+            return True
+        if status == 403 and isinstance(error.error_details, list):
+            return any(
+                isinstance(detail, dict)
+                and detail.get("reason") in self.RATE_LIMIT_REASONS
+                for detail in error.error_details
+            )
+        return False
+
+    def _backoff(self, error: HttpError, attempt: int) -> float:
+        """Seconds to wait before retrying a failed request"""
+        retry_after = error.resp.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(2**attempt, self.max_backoff) + random.uniform(0, 1)
+
+    async def call(self, func, *args, **kwargs) -> Any:
+        """Run a Drive request under the limiter, retrying rate-limit errors"""
+        attempt = 0
+        while True:
+            await self.acquire()
+            try:
+                # googleapiclient is synchronous; keep it off the event loop
+                return await asyncio.to_thread(func, *args, **kwargs)
+            except HttpError as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self._backoff(e, attempt)
+                logger.warning(
+                    "Drive request failed with %s, retrying in %.1fs",
+                    e.resp.status,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+# Shared by every Drive request made by this process
+drive_rate_limiter = DriveRateLimiter()
+
+# Integration attributes keyed by (user_id, provider). Writes made through
+# this process invalidate entries; the TTL bounds staleness across workers.
+integration_cache = TTLCache(
+    maxsize=settings.INTEGRATION_CACHE_MAX_SIZE,
+    ttl=settings.INTEGRATION_CACHE_TTL_SECONDS,
+)
+
 
 class IntegrationService(
     BaseService[
@@ -54,23 +189,78 @@ class IntegrationService(
 ):
     """Service for managing external integrations"""
 
+    @staticmethod
+    def _invalidate(integration: ExternalIntegration | None) -> None:
+        """Drop the cached lookup for an integration"""
+        if integration:
+            integration_cache.pop((integration.user_id, integration.provider))
+
     async def get_by_user_and_provider(
         self, db: AsyncSession, user_id: str, provider: str
     ) -> ExternalIntegration | None:
         """Get integration by user ID and provider"""
-        logger.info(f"Looking for integration: user_id={user_id}, provider={provider}")
+        # Hand out a fresh instance so callers can't mutate the cached copy
+        cached = integration_cache.get((user_id, provider))
+        if cached is not None:
+            return ExternalIntegration(**cached)
+
+        logger.info(
+            "Looking for integration: user_id=%s, provider=%s", user_id, provider
+        )
         integrations = await db.filter(
             ExternalIntegration, user_id=user_id, provider=provider
         )
         integration = integrations[0] if integrations else None
+        if integration:
+            integration_cache.set((user_id, provider), dict(vars(integration)))
 
-        logger.info(f"Integration found: {integration is not None}")
+        logger.info("Integration found: %s", integration is not None)
         if integration:
             logger.info(
-                f"Integration details: id={integration.id}, provider_email={integration.provider_email}"
+                "Integration details: id=%s, provider_email=%s",
+                integration.id,
+                integration.provider_email,
             )
         return integration
 
+    async def get_active_by_user_and_provider(
+        self,
+        db: DynamoDBSession,
+        user_id: str,
+        provider: str,
+        leeway: timedelta = timedelta(seconds=60),
+    ) -> ExternalIntegration | None:
+        """Get integration by user ID and provider if its token is still valid"""
+        cutoff = datetime.now(UTC) + leeway
+        cached = integration_cache.get((user_id, provider))
+        if cached is not None:
+            expiry = ensure_timezone_aware(cached.get("token_expiry"))
+            return ExternalIntegration(**cached) if expiry and expiry > cutoff else None
+
+        # token_expiry is stored as a UTC ISO-8601 string, so the range key
+        # condition compares chronologically and skips expired tokens
+        table = db.dynamodb.Table(db.tables.get("integrations"))
+        # Run in a thread so the blocking boto3 call stays off the event loop
+        response = await asyncio.to_thread(
+            table.query,
+            IndexName="UserTokenExpiryIndex",
+            KeyConditionExpression="user_id = :user_id AND token_expiry > :cutoff",
+            FilterExpression="provider = :provider",
+            ExpressionAttributeValues={
+                ":user_id": user_id,
+                ":cutoff": cutoff.isoformat(),
+                ":provider": provider,
+            },
+        )
+        items = response.get("Items", [])
+        if not items:
+            return None
+
+        integration = ExternalIntegration(**items[0])
+        integration.token_expiry = datetime.fromisoformat(integration.token_expiry)
+        integration_cache.set((user_id, provider), dict(vars(integration)))
+        return integration
+
     async def delete_by_user_and_provider(
         self, db: AsyncSession, user_id: str, provider: str
     ) -> None:
@@ -81,6 +271,50 @@ class IntegrationService(
         for integration in integrations:
             await db.delete(integration)
         await db.commit()
+        integration_cache.pop((user_id, provider))
+
+    async def create(
+        self, db: DynamoDBSession, *, obj_in: ExternalIntegrationCreate
+    ) -> ExternalIntegration:
+        """Create an integration"""
+        integration = await super().create(db, obj_in=obj_in)
+        self._invalidate(integration)
+        return integration
+
+    async def create_with_id(
+        self,
+        db: DynamoDBSession,
+        *,
+        obj_in: ExternalIntegrationCreate | dict[str, Any],
+        id: str,
+        user_id: str | None = None,
+    ) -> ExternalIntegration:
+        """Create an integration with a specific ID"""
+        integration = await super().create_with_id(
+            db, obj_in=obj_in, id=id, user_id=user_id
+        )
+        self._invalidate(integration)
+        return integration
+
+    async def update(
+        self,
+        db: DynamoDBSession,
+        *,
+        db_obj: ExternalIntegration,
+        obj_in: ExternalIntegrationUpdate | dict[str, Any],
+    ) -> ExternalIntegration:
+        """Update an integration"""
+        integration = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        self._invalidate(integration)
+        return integration
+
+    async def remove(
+        self, db: DynamoDBSession, *, id: str
+    ) -> ExternalIntegration | None:
+        """Remove an integration"""
+        integration = await super().remove(db, id=id)
+        self._invalidate(integration)
+        return integration
 
 
 class GoogleDriveService:
@@ -95,14 +329,13 @@ class GoogleDriveService:
             "client_id": settings.GOOGLE_CLIENT_ID,
             "redirect_uri": settings.GOOGLE_REDIRECT_URI,
             "response_type": "code",
-            "scope": " ".join(settings.GOOGLE_AUTH_SCOPES),
+            "scope": _SCOPES,
             "access_type": "offline",
             "prompt": "consent",
             "state": state,  # Used to maintain state between request and callback
         }
 
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        return f"{base_url}?{query_string}"
+        return f"{base_url}?{urlencode(params, quote_via=quote)}"
 
     @staticmethod
     async def exchange_code_for_token(code: str) -> dict[str, Any]:
@@ -168,8 +401,11 @@ class GoogleDriveService:
             # Ensure token_expiry is timezone-aware for comparison
             token_expiry = ensure_timezone_aware(integration.token_expiry)
             needs_refresh = token_expiry <= now
-            print(
-                f"[DEBUG] Token comparison: token_expiry={token_expiry}, now={now}, needs_refresh={needs_refresh}"
+            logger.debug(
+                "Token comparison: token_expiry=%s, now=%s, needs_refresh=%s",
+                token_expiry,
+                now,
+                needs_refresh,
             )
 
         # If token needs refresh
@@ -179,8 +415,10 @@ class GoogleDriveService:
                     "Refresh token not available. User needs to re-authenticate."
                 )
 
-            print(
-                f"[DEBUG] Refreshing token: current token_expiry={integration.token_expiry}, now={now}"
+            logger.debug(
+                "Refreshing token: current token_expiry=%s, now=%s",
+                integration.token_expiry,
+                now,
             )
 
             token_url = "https://oauth2.googleapis.com/token"
@@ -211,9 +449,16 @@ class GoogleDriveService:
                     db.add(integration)
                     await db.commit()
                     await db.refresh(integration)
+                    integration_cache.pop((integration.user_id, integration.provider))
 
         return integration
 
+    async def ensure_fresh_token(
+        self, db: AsyncSession, integration: ExternalIntegration
+    ) -> ExternalIntegration:
+        """Return the integration with a usable token, refreshing it if expired"""
+        return await self._refresh_token_if_needed(db, integration)
+
     async def list_files(
         self,
         db: AsyncSession,
@@ -228,12 +473,14 @@ class GoogleDriveService:
 
         # Create credentials and build service
         credentials = self._credentials_from_db_model(integration)
-        drive_service = build("drive", "v3", credentials=credentials)
+        drive_service = await asyncio.to_thread(
+            build, "drive", "v3", credentials=credentials
+        )
 
         # Prepare query
         query = "trashed = false"
         if folder_id:
-            query += f" and '{folder_id}' in parents"
+            query += f" and '{_escape_query_value(folder_id)}' in parents"
         else:
             # For root level, only show files that are directly in the root
             query += " and 'root' in parents"
@@ -241,55 +488,21 @@ class GoogleDriveService:
         # Execute request
         fields = "nextPageToken, files(id, name, mimeType, size, webViewLink, thumbnailLink, modifiedTime, createdTime, parents)"
 
-        response = (
-            drive_service.files()
-            .list(
-                q=query,
-                spaces="drive",
-                fields=fields,
-                pageToken=page_token,
-                pageSize=page_size,
-                orderBy="name",
-            )
-            .execute()
+        request = drive_service.files().list(
+            q=query,
+            spaces="drive",
+            fields=fields,
+            pageToken=page_token,
+            pageSize=page_size,
+            orderBy="name",
         )
+        response = await drive_rate_limiter.call(request.execute)
 
         # Process results
         files = []
         for item in response.get("files", []):
-            is_folder = item["mimeType"] == "application/vnd.google-apps.folder"
-
             try:
-                modified_time = None
-                if item.get("modifiedTime"):
-                    modified_time = ensure_timezone_aware(
-                        datetime.fromisoformat(
-                            item.get("modifiedTime").replace("Z", "+00:00")
-                        )
-                    )
-
-                created_time = None
-                if item.get("createdTime"):
-                    created_time = ensure_timezone_aware(
-                        datetime.fromisoformat(
-                            item.get("createdTime").replace("Z", "+00:00")
-                        )
-                    )
-
-                files.append(
-                    GoogleDriveFile(
-                        id=item["id"],
-                        name=item["name"],
-                        mime_type=item["mimeType"],
-                        size=int(item.get("size", 0)) if item.get("size") else None,
-                        web_view_link=item.get("webViewLink"),
-                        thumbnail_link=item.get("thumbnailLink"),
-                        modified_time=modified_time,
-                        created_time=created_time,
-                        parents=item.get("parents", []),
-                        is_folder=is_folder,
-                    )
-                )
+                files.append(self._parse_drive_item(item))
             except Exception as e:
                 print(f"[ERROR] Error processing file {item.get('name')}: {str(e)}")
                 # Continue with other files
@@ -301,6 +514,28 @@ class GoogleDriveService:
 
         return files, next_page_token
 
+    @staticmethod
+    def _parse_drive_item(item: dict[str, Any]) -> GoogleDriveFile:
+        """Build a GoogleDriveFile from a Drive file resource"""
+        mime_type = item["mimeType"]
+        size = item.get("size")
+
+        return GoogleDriveFile(
+            id=item["id"],
+            name=item["name"],
+            mime_type=mime_type,
+            size=int(size) if size else None,
+            web_view_link=item.get("webViewLink"),
+            web_content_link=item.get("webContentLink"),
+            thumbnail_link=item.get("thumbnailLink"),
+            md5_checksum=item.get("md5Checksum"),
+            modified_time=_parse_drive_ts(item.get("modifiedTime")),
+            created_time=_parse_drive_ts(item.get("createdTime")),
+            parents=item.get("parents", []),
+            is_folder=mime_type == "application/vnd.google-apps.folder",
+            export_links=item.get("exportLinks"),
+        )
+
     async def get_file_metadata(
         self, db: AsyncSession, integration: ExternalIntegration, file_id: str
     ) -> GoogleDriveFile:
@@ -310,77 +545,90 @@ class GoogleDriveService:
 
         # Create credentials and build service
         credentials = self._credentials_from_db_model(integration)
-        drive_service = build("drive", "v3", credentials=credentials)
+        drive_service = await asyncio.to_thread(
+            build, "drive", "v3", credentials=credentials
+        )
 
         # Execute request
-        fields = "id, name, mimeType, size, webViewLink, webContentLink, thumbnailLink, md5Checksum, modifiedTime, createdTime, parents, exportLinks"
+        request = drive_service.files().get(fileId=file_id, fields=FILE_METADATA_FIELDS)
+        file = await drive_rate_limiter.call(request.execute)
 
-        file = drive_service.files().get(fileId=file_id, fields=fields).execute()
+        return self._parse_drive_item(file)
 
-        is_folder = file["mimeType"] == "application/vnd.google-apps.folder"
+    async def get_files_metadata(
+        self, db: AsyncSession, integration: ExternalIntegration, file_ids: list[str]
+    ) -> dict[str, GoogleDriveFile]:
+        """Get metadata for many files using Drive batch requests
 
-        modified_time = None
-        if file.get("modifiedTime"):
-            modified_time = ensure_timezone_aware(
-                datetime.fromisoformat(file.get("modifiedTime").replace("Z", "+00:00"))
-            )
+        Up to DRIVE_BATCH_LIMIT files.get calls are sent per HTTP round trip.
+        Files whose lookup fails are left out of the result.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        if not file_ids:
+            return {}
 
-        created_time = None
-        if file.get("createdTime"):
-            created_time = ensure_timezone_aware(
-                datetime.fromisoformat(file.get("createdTime").replace("Z", "+00:00"))
-            )
+        # Refresh token if needed
+        integration = await self._refresh_token_if_needed(db, integration)
 
-        return GoogleDriveFile(
-            id=file["id"],
-            name=file["name"],
-            mime_type=file["mimeType"],
-            size=int(file.get("size", 0)) if file.get("size") else None,
-            web_view_link=file.get("webViewLink"),
-            web_content_link=file.get("webContentLink"),
-            thumbnail_link=file.get("thumbnailLink"),
-            md5_checksum=file.get("md5Checksum"),
-            modified_time=modified_time,
-            created_time=created_time,
-            parents=file.get("parents", []),
-            is_folder=is_folder,
-            export_links=file.get("exportLinks"),
+        # Create credentials and build service
+        credentials = self._credentials_from_db_model(integration)
+        drive_service = await asyncio.to_thread(
+            build, "drive", "v3", credentials=credentials
         )
 
+        results: dict[str, GoogleDriveFile] = {}
+
+        def _collect(request_id: str, response: dict[str, Any], exception) -> None:
+            if exception is not None:
+                logger.warning(
+                    "Failed to fetch metadata for %s: %s", request_id, exception
+                )
+                return
+            results[request_id] = self._parse_drive_item(response)
+
+        for start in range(0, len(file_ids), DRIVE_BATCH_LIMIT):
+            batch = drive_service.new_batch_http_request(callback=_collect)
+            for file_id in file_ids[start : start + DRIVE_BATCH_LIMIT]:
+                batch.add(
+                    drive_service.files().get(
+                        fileId=file_id, fields=FILE_METADATA_FIELDS
+                    ),
+                    request_id=file_id,
+                )
+            await drive_rate_limiter.call(batch.execute)
+
+        return results
+
     async def download_file(
-        self, db: AsyncSession, integration: ExternalIntegration, file_id: str
+        self,
+        db: AsyncSession,
+        integration: ExternalIntegration,
+        file_id: str,
+        file_metadata: GoogleDriveFile | None = None,
     ) -> tuple[bytes, str, str]:
-        """Download a file from Google Drive"""
+        """Download a file from Google Drive
+
+        Pass file_metadata when it is already known (e.g. from a batch lookup)
+        to skip the extra metadata request.
+        """
         # Refresh token if needed
         integration = await self._refresh_token_if_needed(db, integration)
 
         # Get file metadata first
-        file_metadata = await self.get_file_metadata(db, integration, file_id)
+        if file_metadata is None:
+            file_metadata = await self.get_file_metadata(db, integration, file_id)
 
         # Create credentials and build service
         credentials = self._credentials_from_db_model(integration)
-        drive_service = build("drive", "v3", credentials=credentials)
+        drive_service = await asyncio.to_thread(
+            build, "drive", "v3", credentials=credentials
+        )
 
         # For Google Docs, Sheets, etc., export in appropriate format
         if file_metadata.mime_type.startswith("application/vnd.google-apps"):
-            if file_metadata.mime_type == "application/vnd.google-apps.document":
-                export_mime_type = "application/pdf"
-                file_extension = ".pdf"
-            elif file_metadata.mime_type == "application/vnd.google-apps.spreadsheet":
-                export_mime_type = (
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-                file_extension = ".xlsx"
-            elif file_metadata.mime_type == "application/vnd.google-apps.presentation":
-                export_mime_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                file_extension = ".pptx"
-            elif file_metadata.mime_type == "application/vnd.google-apps.drawing":
-                export_mime_type = "image/png"
-                file_extension = ".png"
-            else:
-                # Default to PDF for other Google Workspace documents
-                export_mime_type = "application/pdf"
-                file_extension = ".pdf"
+            export_mime_type, file_extension = _GDOC_EXPORT.get(
+                file_metadata.mime_type, _GDOC_DEFAULT_EXPORT
+            )
 
             # Ensure filename ends with appropriate extension
             filename = file_metadata.name
@@ -395,9 +643,10 @@ class GoogleDriveService:
                 and export_mime_type in file_metadata.export_links
             ):
                 download_url = file_metadata.export_links[export_mime_type]
-                logger.info(f"Downloading via exportLink: {download_url}")
+                logger.info("Downloading via exportLink: %s", download_url)
 
                 headers = {"Authorization": f"Bearer {integration.access_token}"}
+                await drive_rate_limiter.acquire()
                 async with aiohttp.ClientSession() as session:
                     async with session.get(download_url, headers=headers) as resp:
                         if resp.status != 200:
@@ -407,7 +656,9 @@ class GoogleDriveService:
                             )
                         file_content = await resp.read()
 
-                logger.info(f"Downloaded file {filename} ({len(file_content)} bytes)")
+                logger.info(
+                    "Downloaded file %s (%d bytes)", filename, len(file_content)
+                )
 
                 # Validate content
                 if len(file_content) == 0:
@@ -428,7 +679,10 @@ class GoogleDriveService:
                 ):
                     # Log warning but don't fail, as it might be some other format or encrypted
                     logger.warning(
-                        f"File {filename} does not start with ZIP header (PK\\x03\\x04). First bytes: {file_content[:10].hex()}"
+                        "File %s does not start with ZIP header (PK\\x03\\x04). "
+                        "First bytes: %s",
+                        filename,
+                        file_content[:10].hex(),
                     )
 
                 return file_content, mime_type, filename
@@ -452,10 +706,10 @@ class GoogleDriveService:
         downloader = MediaIoBaseDownload(fh, request)
         done = False
         while done is False:
-            status, done = downloader.next_chunk()
+            status, done = await drive_rate_limiter.call(downloader.next_chunk)
 
         file_content = fh.getvalue()
-        logger.info(f"Downloaded file {filename} ({len(file_content)} bytes)")
+        logger.info("Downloaded file %s (%d bytes)", filename, len(file_content))
 
         # Validate content
         if len(file_content) == 0:
@@ -477,22 +731,21 @@ class GoogleDriveService:
                 raise ValueError(
                     f"MD5 checksum mismatch for {filename}. Expected {file_metadata.md5_checksum}, got {md5_hash}"
                 )
-            logger.info(f"MD5 checksum verified for {filename}")
+            logger.info("MD5 checksum verified for %s", filename)
 
         return file_content, mime_type, filename
 
-    async def import_file(
+    async def _download_for_import(
         self,
         db: AsyncSession,
-        user_id: str,
         integration: ExternalIntegration,
         file_id: str,
-        folder_id: str | None = None,
-    ) -> str:
-        """Import a file from Google Drive into the data room"""
+        file_metadata: GoogleDriveFile | None = None,
+    ) -> dict[str, Any]:
+        """Download a Drive file into storage and return its document fields"""
         # Download file content
         file_content, mime_type, file_name = await self.download_file(
-            db, integration, file_id
+            db, integration, file_id, file_metadata
         )
 
         # Save file using document service (which uses storage provider)
@@ -501,18 +754,31 @@ class GoogleDriveService:
             file_content, unique_filename, mime_type
         )
 
-        # Get file size
-        file_size = len(file_content)
+        return {
+            "name": file_name,
+            "description": f"Imported from Google Drive - {datetime.now()}",
+            "file_path": file_path,
+            "file_type": mime_type,
+            "file_size": len(file_content),
+        }
+
+    async def import_file(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        integration: ExternalIntegration,
+        file_id: str,
+        folder_id: str | None = None,
+        file_metadata: GoogleDriveFile | None = None,
+    ) -> str:
+        """Import a file from Google Drive into the data room"""
+        document_fields = await self._download_for_import(
+            db, integration, file_id, file_metadata
+        )
 
         # Create document using document service
         document_id = await document_service.create_document(
-            user_id=user_id,
-            name=file_name,
-            description=f"Imported from Google Drive - {datetime.now()}",
-            file_path=file_path,
-            file_type=mime_type,
-            file_size=file_size,
-            folder_id=folder_id,
+            user_id=user_id, folder_id=folder_id, **document_fields
         )
 
         return document_id
@@ -554,41 +820,81 @@ class GoogleDriveService:
         # List all items in the Google Drive folder
         items, _ = await self.list_files(db, integration, folder_id)
 
+        # Fetch metadata for every file in the folder in batched round trips
+        files_metadata = await self.get_files_metadata(
+            db, integration, [item.id for item in items if not item.is_folder]
+        )
+
         imported_files = 0
         imported_folders = 0
         skipped_items = 0
 
-        # Process each item
+        # Recursively import subfolders; files are collected for the phase below
+        files = []
         for item in items:
+            if not item.is_folder:
+                files.append(item)
+                continue
             try:
-                if item.is_folder:
-                    # Recursively import folders
-                    result = await self.import_folder(
-                        db=db,
-                        user_id=user_id,
-                        integration=integration,
-                        folder_id=item.id,
-                        parent_folder_id=local_folder.id,
-                        max_depth=max_depth - 1,
-                    )
-                    imported_folders += 1 + result["imported_folders"]
-                    imported_files += result["imported_files"]
-                    skipped_items += result["skipped_items"]
-                else:
-                    # Import file
-                    await self.import_file(
-                        db=db,
-                        user_id=user_id,
-                        integration=integration,
-                        file_id=item.id,
-                        folder_id=local_folder.id,
-                    )
-                    imported_files += 1
+                result = await self.import_folder(
+                    db=db,
+                    user_id=user_id,
+                    integration=integration,
+                    folder_id=item.id,
+                    parent_folder_id=local_folder.id,
+                    max_depth=max_depth - 1,
+                )
+                imported_folders += 1 + result["imported_folders"]
+                imported_files += result["imported_files"]
+                skipped_items += result["skipped_items"]
             except Exception as e:
                 # Log error but continue importing other items
                 print(f"Error importing {item.name}: {str(e)}")
                 skipped_items += 1
 
+        # Refresh once so the concurrent downloads don't each refresh the token
+        integration = await self.ensure_fresh_token(db, integration)
+        semaphore = asyncio.Semaphore(IMPORT_DOWNLOAD_CONCURRENCY)
+
+        async def download(item: GoogleDriveFile) -> dict[str, Any] | None:
+            async with semaphore:
+                try:
+                    return await self._download_for_import(
+                        db, integration, item.id, files_metadata.get(item.id)
+                    )
+                except Exception as e:
+                    # Log error but continue importing other items
+                    print(f"Error importing {item.name}: {str(e)}")
+                    return None
+
+        # Download files concurrently; their records are written together
+        downloads = await asyncio.gather(*(download(item) for item in files))
+        pending_documents = [
+            {"user_id": user_id, "folder_id": local_folder.id, **document_fields}
+            for document_fields in downloads
+            if document_fields is not None
+        ]
+        skipped_items += len(files) - len(pending_documents)
+
+        # Create all document records for this folder in one batched write
+        if pending_documents:
+            try:
+                await document_service.create_documents(pending_documents)
+                imported_files += len(pending_documents)
+            except Exception as e:
+                logger.error("Error creating imported documents: %s", e)
+                # No record points at the downloaded files, so don't keep them
+                for document in pending_documents:
+                    try:
+                        await document_service.delete_content(document["file_path"])
+                    except Exception as delete_error:
+                        logger.error(
+                            "Error deleting imported file %s: %s",
+                            document["file_path"],
+                            delete_error,
+                        )
+                skipped_items += len(pending_documents)
+
         return {
             "status": "success",
             "folder_id": local_folder.id,
@@ -606,10 +912,13 @@ class GoogleDriveService:
 
         # Create credentials and build service
         credentials = self._credentials_from_db_model(integration)
-        drive_service = build("drive", "v3", credentials=credentials)
+        drive_service = await asyncio.to_thread(
+            build, "drive", "v3", credentials=credentials
+        )
 
         # Get storage information about the user
-        about = drive_service.about().get(fields="storageQuota").execute()
+        request = drive_service.about().get(fields="storageQuota")
+        about = await drive_rate_limiter.call(request.execute)
 
         storage_quota = about.get("storageQuota", {})
 
@@ -651,63 +960,34 @@ class GoogleDriveService:
 
         # Create credentials and build service
         credentials = self._credentials_from_db_model(integration)
-        drive_service = build("drive", "v3", credentials=credentials)
+        drive_service = await asyncio.to_thread(
+            build, "drive", "v3", credentials=credentials
+        )
 
         # Build search query
-        search_query = f"fullText contains '{query}' and trashed = false"
+        search_query = (
+            f"fullText contains '{_escape_query_value(query)}' and trashed = false"
+        )
 
         # Execute request
         fields = "nextPageToken, files(id, name, mimeType, size, webViewLink, thumbnailLink, modifiedTime, createdTime, parents)"
 
-        response = (
-            drive_service.files()
-            .list(
-                q=search_query,
-                spaces="drive",
-                fields=fields,
-                pageToken=page_token,
-                pageSize=page_size,
-                # Removed invalid 'orderBy="relevance"' parameter
-            )
-            .execute()
+        request = drive_service.files().list(
+            q=search_query,
+            spaces="drive",
+            corpora="user",
+            fields=fields,
+            pageToken=page_token,
+            pageSize=page_size,
+            # Removed invalid 'orderBy="relevance"' parameter
         )
+        response = await drive_rate_limiter.call(request.execute)
 
         # Process results
         files = []
         for item in response.get("files", []):
-            is_folder = item["mimeType"] == "application/vnd.google-apps.folder"
-
             try:
-                modified_time = None
-                if item.get("modifiedTime"):
-                    modified_time = ensure_timezone_aware(
-                        datetime.fromisoformat(
-                            item.get("modifiedTime").replace("Z", "+00:00")
-                        )
-                    )
-
-                created_time = None
-                if item.get("createdTime"):
-                    created_time = ensure_timezone_aware(
-                        datetime.fromisoformat(
-                            item.get("createdTime").replace("Z", "+00:00")
-                        )
-                    )
-
-                files.append(
-                    GoogleDriveFile(
-                        id=item["id"],
-                        name=item["name"],
-                        mime_type=item["mimeType"],
-                        size=int(item.get("size", 0)) if item.get("size") else None,
-                        web_view_link=item.get("webViewLink"),
-                        thumbnail_link=item.get("thumbnailLink"),
-                        modified_time=modified_time,
-                        created_time=created_time,
-                        parents=item.get("parents", []),
-                        is_folder=is_folder,
-                    )
-                )
+                files.append(self._parse_drive_item(item))
             except Exception as e:
                 print(
                     f"[ERROR] Error processing search result {item.get('name')}: {str(e)}"
@@ -3,8 +3,8 @@ AWS S3 adapter for file storage.
 Used when running in AWS Lambda to store files in S3 instead of local filesystem.
 """
 
+import asyncio
 import os
-import tempfile
 import uuid
 from pathlib import Path
 from typing import BinaryIO, Optional
@@ -41,28 +41,19 @@ class S3Storage:
         if not filename:
             filename = f"{uuid.uuid4()}-{file.filename}"
 
-        # Create a temp file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            # Write uploaded file to temp file
-            content = await file.read()
-            temp_file.write(content)
-            temp_file.flush()
-
-            # Upload to S3
-            try:
-                self.s3_client.upload_file(
-                    temp_file.name,
-                    self.bucket_name,
-                    filename,
-                    ExtraArgs={"ContentType": file.content_type},
-                )
-            except ClientError as e:
-                # Clean up temp file
-                os.unlink(temp_file.name)
-                raise ValueError(f"Failed to upload file to S3: {str(e)}")
-
-            # Clean up temp file
-            os.unlink(temp_file.name)
+        # Stream the upload straight to S3, without a temp file or in-memory copy
+        extra_args = {"ContentType": file.content_type} if file.content_type else {}
+        await file.seek(0)
+        try:
+            await asyncio.to_thread(
+                self.s3_client.upload_fileobj,
+                file.file,
+                self.bucket_name,
+                filename,
+                ExtraArgs=extra_args,
+            )
+        except ClientError as e:
+            raise ValueError(f"Failed to upload file to S3: {str(e)}")
 
         return filename
 
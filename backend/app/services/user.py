@@ -1,53 +1,108 @@
+import asyncio
 from typing import Any, Dict, List, Optional
 
+from boto3.dynamodb.conditions import Key
+
+from app.core.config import settings
 from app.core.security import generate_uuid, get_password_hash, verify_password
 from app.db.dynamodb_session import DynamoDBSession
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.services.base import BaseService
+from app.utils.cache import TTLCache
+
+# Raw user items keyed by (attribute, value). Each process has its own copy,
+# so the TTL bounds how long another worker's writes can go unseen.
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+_CACHED_ATTRIBUTES = ("id", "email", "username", "google_id")
+
+# Username candidates checked per round when generating a unique username
+USERNAME_PROBE_BATCH = 10
 
 
 class UserService(BaseService[User, UserCreate, UserUpdate]):
     """Service for user operations"""
 
+    @staticmethod
+    def _cache_item(item: dict[str, Any]) -> None:
+        """Cache a user item under each of its lookup keys"""
+        for attr in _CACHED_ATTRIBUTES:
+            if item.get(attr):
+                user_cache.set((attr, item[attr]), item)
+
+    @staticmethod
+    def _invalidate(user: User) -> None:
+        """Drop every cached lookup key for a user"""
+        for attr in _CACHED_ATTRIBUTES:
+            value = getattr(user, attr, None)
+            if value:
+                user_cache.pop((attr, value))
+
+    async def _get_by_index(
+        self, db: DynamoDBSession, index_name: str, attr: str, value: str
+    ) -> User | None:
+        """Get user by a GSI-backed attribute, going through the cache"""
+        item = user_cache.get((attr, value))
+        if item is None:
+            table = db.dynamodb.Table(db.tables.get("users"))
+            # Run in a thread so concurrent lookups can overlap
+            response = await asyncio.to_thread(
+                table.query,
+                IndexName=index_name,
+                KeyConditionExpression=Key(attr).eq(value),
+                Limit=1,
+            )
+            items = response.get("Items", [])
+            if not items:
+                return None
+            item = items[0]
+            self._cache_item(item)
+
+        return User(**item)
+
+    async def get(self, db: DynamoDBSession, id: str) -> User | None:
+        """Get user by ID"""
+        item = user_cache.get(("id", id))
+        if item is None:
+            table = db.dynamodb.Table(db.tables.get("users"))
+            item = table.get_item(Key={"id": id}).get("Item")
+            if not item:
+                return None
+            self._cache_item(item)
+
+        return User(**item)
+
     async def get_by_email(self, db: DynamoDBSession, *, email: str) -> User | None:
         """Get user by email"""
-        table = db.dynamodb.Table(db.tables.get("users"))
-        response = table.scan(
-            FilterExpression="email = :email",
-            ExpressionAttributeValues={":email": email},
-        )
-        items = response.get("Items", [])
-        if not items:
-            return None
-
-        # Create User object from the first matching item
-        return User(**items[0])
+        return await self._get_by_index(db, "EmailIndex", "email", email)
 
     async def get_by_google_id(
         self, db: DynamoDBSession, *, google_id: str
     ) -> User | None:
         """Get user by Google ID"""
-        table = db.dynamodb.Table(db.tables.get("users"))
-        response = table.scan(
-            FilterExpression="google_id = :google_id",
-            ExpressionAttributeValues={":google_id": google_id},
-        )
-        items = response.get("Items", [])
-        if not items:
-            return None
-
-        # Create User object from the first matching item
-        return User(**items[0])
+        return await self._get_by_index(db, "GoogleIdIndex", "google_id", google_id)
 
     async def create_or_update_google_user(
         self, db: DynamoDBSession, *, google_user_info: dict
     ) -> User:
         """Create or update a user from Google OAuth data"""
-        # Check if user with google_id exists
         google_id = google_user_info["id"]
+        email = google_user_info.get("email")
 
-        existing_user = await self.get_by_google_id(db, google_id=google_id)
+        # Look up by google_id and by email at the same time
+        if email:
+            existing_user, existing_user_by_email = await asyncio.gather(
+                self.get_by_google_id(db, google_id=google_id),
+                self.get_by_email(db, email=email),
+            )
+        else:
+            existing_user = await self.get_by_google_id(db, google_id=google_id)
+            existing_user_by_email = None
+
+        # Check if user with google_id exists
         if existing_user:
             # Update the existing user with any new info
             update_data = {}
@@ -60,11 +115,9 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
             return existing_user
 
         # Check if user exists by email
-        email = google_user_info.get("email")
         if not email:
             raise ValueError("Google user info must contain an email address")
 
-        existing_user_by_email = await self.get_by_email(db, email=email)
         if existing_user_by_email:
             # Link the Google account to the existing user
             update_data = {"google_id": google_id, "auth_provider": "google"}
@@ -74,14 +127,10 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
             return existing_user
 
         # Create a new user
-        username = email.split("@")[0]  # Use part before @ as username
-        base_username = username
-
-        # Make sure username is unique
-        counter = 1
-        while await self.get_by_username(db, username=username):
-            username = f"{base_username}{counter}"
-            counter += 1
+        username = await self._first_free_username(
+            db,
+            base_username=email.split("@")[0],  # Use part before @ as username
+        )
 
         new_user = User(
             id=generate_uuid(),
@@ -95,37 +144,66 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
             hashed_password=None,  # No password for Google users
         )
 
+        self._invalidate(new_user)
         await db.add(new_user)
         await db.commit()
         await db.refresh(new_user)
 
         return new_user
 
+    async def _first_free_username(
+        self, db: DynamoDBSession, *, base_username: str
+    ) -> str:
+        """Pick base_username, or base_username plus the lowest free counter"""
+        start = 0
+        while True:
+            # Probe a batch of candidates concurrently instead of one at a time
+            candidates = [
+                f"{base_username}{counter}" if counter else base_username
+                for counter in range(start, start + USERNAME_PROBE_BATCH)
+            ]
+            taken = await asyncio.gather(
+                *(self.username_exists(db, username=c) for c in candidates)
+            )
+            for candidate, is_taken in zip(candidates, taken, strict=True):
+                if not is_taken:
+                    return candidate
+            start += USERNAME_PROBE_BATCH
+
     async def get_by_username(
         self, db: DynamoDBSession, *, username: str
     ) -> User | None:
         """Get user by username"""
+        return await self._get_by_index(db, "UsernameIndex", "username", username)
+
+    async def username_exists(self, db: DynamoDBSession, *, username: str) -> bool:
+        """Check whether a username is taken, fetching only the key"""
+        if user_cache.get(("username", username)) is not None:
+            return True
         table = db.dynamodb.Table(db.tables.get("users"))
-        response = table.scan(
-            FilterExpression="username = :username",
-            ExpressionAttributeValues={":username": username},
+        # Partial items are never cached, so full lookups stay complete
+        response = await asyncio.to_thread(
+            table.query,
+            IndexName="UsernameIndex",
+            KeyConditionExpression=Key("username").eq(username),
+            ProjectionExpression="id",
+            Limit=1,
         )
-        items = response.get("Items", [])
-        if not items:
-            return None
-
-        # Create User object from the first matching item
-        return User(**items[0])
+        return bool(response.get("Items"))
 
     async def create(self, db: DynamoDBSession, *, obj_in: UserCreate) -> User:
         """Create a new user"""
+        # Hashing is CPU-bound, so keep it off the event loop
+        hashed_password = (
+            await asyncio.to_thread(get_password_hash, obj_in.password)
+            if hasattr(obj_in, "password") and obj_in.password
+            else None
+        )
         db_obj = User(
             id=generate_uuid(),
             email=obj_in.email,
             username=obj_in.username,
-            hashed_password=get_password_hash(obj_in.password)
-            if hasattr(obj_in, "password") and obj_in.password
-            else None,
+            hashed_password=hashed_password,
             full_name=obj_in.full_name,
             is_active=True,
             is_superuser=False,
@@ -133,6 +211,7 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
             if hasattr(obj_in, "auth_provider")
             else "local",
         )
+        self._invalidate(db_obj)
         await db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
@@ -152,24 +231,38 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
             update_data = obj_in.model_dump(exclude_unset=True)
 
         if update_data.get("password"):
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await asyncio.to_thread(
+                get_password_hash, update_data["password"]
+            )
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
 
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        # Drop keys for both the old and the new email/username
+        self._invalidate(db_obj)
+        user = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        self._invalidate(user)
+        return user
+
+    async def remove(self, db: DynamoDBSession, *, id: str) -> User | None:
+        """Remove user"""
+        user = await super().remove(db, id=id)
+        if user:
+            self._invalidate(user)
+        return user
 
     async def authenticate(
         self, db: DynamoDBSession, *, email_or_username: str, password: str
     ) -> User | None:
         """Authenticate user by email/username and password"""
-        # First try to find by email
-        user = await self.get_by_email(db, email=email_or_username)
-        # If not found, try by username
+        # Emails always contain "@", so a bare identifier can only be a username
+        user = None
+        if "@" in email_or_username:
+            user = await self.get_by_email(db, email=email_or_username)
         if not user:
             user = await self.get_by_username(db, username=email_or_username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await asyncio.to_thread(verify_password, password, user.hashed_password):
             return None
         return user
 
@@ -3,6 +3,7 @@ Application constants
 """
 
 from enum import Enum
+from types import MappingProxyType
 
 
 # User related constants
@@ -45,56 +46,65 @@ DATE_FORMAT = "%Y-%m-%d"
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATETIME_FORMAT_WITH_TZ = "%Y-%m-%dT%H:%M:%S%z"
 
-# Common file mime types
-MIME_TYPES = {
-    # Documents
-    "pdf": "application/pdf",
-    "doc": "application/msword",
-    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    "xls": "application/vnd.ms-excel",
-    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    "ppt": "application/vnd.ms-powerpoint",
-    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    # Images
-    "jpg": "image/jpeg",
-    "jpeg": "image/jpeg",
-    "png": "image/png",
-    "gif": "image/gif",
-    # Text
-    "txt": "text/plain",
-    "csv": "text/csv",
-    "html": "text/html",
-    "xml": "application/xml",
-    "json": "application/json",
-    # Archive
-    "zip": "application/zip",
-    "tar": "application/x-tar",
-    "gz": "application/gzip",
-}
+# Common file mime types (read-only)
+MIME_TYPES = MappingProxyType(
+    {
+        # Documents
+        "pdf": "application/pdf",
+        "doc": "application/msword",
+        "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "xls": "application/vnd.ms-excel",
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "ppt": "application/vnd.ms-powerpoint",
+        "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        # Images
+        "jpg": "image/jpeg",
+        "jpeg": "image/jpeg",
+        "png": "image/png",
+        "gif": "image/gif",
+        # Text
+        "txt": "text/plain",
+        "csv": "text/csv",
+        "html": "text/html",
+        "xml": "application/xml",
+        "json": "application/json",
+        # Archive
+        "zip": "application/zip",
+        "tar": "application/x-tar",
+        "gz": "application/gzip",
+    }
+)
+
+# Reverse lookup for content-type sniffing; the first extension listed wins
+MIME_TO_EXT = MappingProxyType(
+    {mime_type: ext for ext, mime_type in reversed(MIME_TYPES.items())}
+)
 
 # Allowed file extensions
-ALLOWED_DOCUMENT_EXTENSIONS = {
-    # Documents
-    "pdf",
-    "doc",
-    "docx",
-    "xls",
-    "xlsx",
-    "ppt",
-    "pptx",
-    # Images
-    "jpg",
-    "jpeg",
-    "png",
-    "gif",
-    # Text
-    "txt",
-    "csv",
-    "html",
-    "xml",
-    "json",
-    # Archive
-    "zip",
-    "tar",
-    "gz",
-}
+ALLOWED_DOCUMENT_EXTENSIONS = frozenset(
+    {
+        # Documents
+        "pdf",
+        "doc",
+        "docx",
+        "xls",
+        "xlsx",
+        "ppt",
+        "pptx",
+        # Images
+        "jpg",
+        "jpeg",
+        "png",
+        "gif",
+        # Text
+        "txt",
+        "csv",
+        "html",
+        "xml",
+        "json",
+        # Archive
+        "zip",
+        "tar",
+        "gz",
+    }
+)
@@ -3,18 +3,69 @@ Storage factory module for creating storage providers.
 Supports both local filesystem storage and S3 storage.
 """
 
+import asyncio
 import logging
 import os
+import shutil
+import time
+from functools import lru_cache
 from typing import Optional, Union
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from fastapi import UploadFile
 
 from app.core.config import settings
+from app.utils.cache import TTLCache
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Copy uploads in chunks instead of holding the whole file in memory
+COPY_CHUNK_SIZE = 1024 * 1024
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+
+
+@lru_cache(maxsize=4)
+def _get_s3_client(
+    region_name: str,
+    aws_access_key_id: str | None,
+    aws_secret_access_key: str | None,
+    aws_session_token: str | None,
+    endpoint_url: str | None,
+):
+    """Create one S3 client per distinct AWS configuration and reuse it"""
+    s3_kwargs = {
+        "region_name": region_name,
+        # Keep HTTP connections open across requests
+        "config": Config(max_pool_connections=50, tcp_keepalive=True),
+    }
+
+    # Add AWS credentials if provided
+    if aws_access_key_id and aws_secret_access_key:
+        s3_kwargs["aws_access_key_id"] = aws_access_key_id
+        s3_kwargs["aws_secret_access_key"] = aws_secret_access_key
+        if aws_session_token:
+            s3_kwargs["aws_session_token"] = aws_session_token
+
+    # Add endpoint URL if provided (for local S3)
+    if endpoint_url:
+        s3_kwargs["endpoint_url"] = endpoint_url
+
+    return boto3.client("s3", **s3_kwargs)
+
+
+# Presigned URLs are reused for this many seconds before being re-signed
+PRESIGNED_URL_REUSE_SECONDS = 300
+
+# (URL, absolute expiry) by (bucket, key, expiration, download filename)
+presigned_url_cache = TTLCache(maxsize=10_000, ttl=PRESIGNED_URL_REUSE_SECONDS)
+
 
 class StorageProvider:
     """Base storage provider interface"""
@@ -33,7 +84,9 @@ class StorageProvider:
         """Delete a file and return success status"""
         raise NotImplementedError()
 
-    def get_presigned_url(self, filename: str, expiration: int = 3600) -> str | None:
+    async def get_presigned_url(
+        self, filename: str, expiration: int = 3600
+    ) -> str | None:
         """Get a presigned URL for downloading the file"""
         return None
 
@@ -57,22 +110,32 @@ class FileSystemStorage(StorageProvider):
 
         file_path = os.path.join(self.upload_folder, filename)
 
-        # Save file to disk
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream file to disk
+        await file.seek(0)
+        await asyncio.to_thread(self._copy_to_path, file.file, file_path)
 
         return file_path
 
+    @staticmethod
+    def _copy_to_path(source, file_path: str) -> None:
+        """Copy a file object to disk in chunks"""
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(source, f, length=COPY_CHUNK_SIZE)
+
+    @staticmethod
+    def _write_bytes(file_path: str, content: bytes) -> None:
+        """Write bytes to disk"""
+        with open(file_path, "wb") as f:
+            f.write(content)
+
     async def save_content(
         self, content: bytes, filename: str, content_type: str = None
     ) -> str:
         """Save bytes content to local filesystem"""
         file_path = os.path.join(self.upload_folder, filename)
 
-        # Save file to disk
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Save file to disk without blocking the event loop
+        await asyncio.to_thread(self._write_bytes, file_path, content)
 
         return file_path
 
@@ -88,13 +151,12 @@ class FileSystemStorage(StorageProvider):
         file_path = os.path.join(self.upload_folder, filename)
 
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Deleted file: {file_path}")
-                return True
-            else:
-                logger.warning(f"File not found during deletion: {file_path}")
-                return True  # Return True if file doesn't exist (already deleted)
+            await asyncio.to_thread(os.remove, file_path)
+            logger.info(f"Deleted file: {file_path}")
+            return True
+        except FileNotFoundError:
+            logger.warning(f"File not found during deletion: {file_path}")
+            return True  # Return True if file doesn't exist (already deleted)
         except Exception as e:
             logger.error(f"Error deleting file {file_path}: {str(e)}")
             return False
@@ -110,21 +172,14 @@ class S3Storage(StorageProvider):
         if not self.bucket_name:
             raise ValueError("S3 bucket name not configured")
 
-        # Initialize S3 client
-        s3_kwargs = {"region_name": settings.AWS_REGION}
-
-        # Add AWS credentials if provided
-        if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
-            s3_kwargs["aws_access_key_id"] = settings.AWS_ACCESS_KEY_ID
-            s3_kwargs["aws_secret_access_key"] = settings.AWS_SECRET_ACCESS_KEY
-            if settings.AWS_SESSION_TOKEN:
-                s3_kwargs["aws_session_token"] = settings.AWS_SESSION_TOKEN
-
-        # Add endpoint URL if provided (for local S3)
-        if settings.AWS_ENDPOINT_URL:
-            s3_kwargs["endpoint_url"] = settings.AWS_ENDPOINT_URL
-
-        self.s3 = boto3.client("s3", **s3_kwargs)
+        # Reuse the shared S3 client
+        self.s3 = _get_s3_client(
+            settings.AWS_REGION,
+            settings.AWS_ACCESS_KEY_ID,
+            settings.AWS_SECRET_ACCESS_KEY,
+            settings.AWS_SESSION_TOKEN,
+            settings.AWS_ENDPOINT_URL,
+        )
         logger.info(f"S3Storage initialized with bucket: {self.bucket_name}")
 
     async def save_file(self, file: UploadFile, filename: str | None = None) -> str:
@@ -132,10 +187,26 @@ class S3Storage(StorageProvider):
         if not filename:
             filename = file.filename
 
-        # Read file content
-        content = await file.read()
+        try:
+            # Stream to S3, switching to a multipart upload for large files
+            extra_args = {}
+            if file.content_type:
+                extra_args["ContentType"] = file.content_type
+
+            await file.seek(0)
+            await asyncio.to_thread(
+                self.s3.upload_fileobj,
+                file.file,
+                self.bucket_name,
+                filename,
+                ExtraArgs=extra_args,
+                Config=S3_TRANSFER_CONFIG,
+            )
 
-        return await self.save_content(content, filename, file.content_type)
+            return filename
+        except Exception as e:
+            logger.error(f"Error saving file to S3: {str(e)}")
+            raise
 
     async def save_content(
         self, content: bytes, filename: str, content_type: str = None
@@ -178,24 +249,45 @@ class S3Storage(StorageProvider):
             logger.error(f"Error deleting file from S3: {str(e)}")
             return False
 
-    def get_presigned_url(self, filename: str, expiration: int = 3600) -> str | None:
+    async def get_presigned_url(
+        self, filename: str, expiration: int = 3600
+    ) -> str | None:
         """Get a presigned URL for downloading the file"""
         original_filename = filename.split("-")[-1]
+        now = time.time()
+        # Only long-lived URLs are reused, and only while they still have at
+        # least expiration minus the reuse window left
+        reusable = expiration > PRESIGNED_URL_REUSE_SECONDS
+        cache_key = (self.bucket_name, filename, expiration, original_filename)
+        if reusable:
+            cached = presigned_url_cache.get(cache_key)
+            if cached is not None:
+                url, expires_at = cached
+                if expires_at - now >= expiration - PRESIGNED_URL_REUSE_SECONDS:
+                    return url
+
         try:
-            response = self.s3.generate_presigned_url(
+            # Signing is local but CPU-bound, so keep it off the event loop
+            url = await asyncio.to_thread(
+                self.s3.generate_presigned_url,
                 "get_object",
                 Params={
                     "Bucket": self.bucket_name,
                     "Key": filename,
-                    "ResponseContentDisposition": f'attachment; filename="{original_filename}"',
+                    "ResponseContentDisposition": (
+                        f'attachment; filename="{original_filename}"'
+                    ),
                 },
                 ExpiresIn=expiration,
             )
-            return response
         except Exception as e:
             logger.error(f"Error generating presigned URL: {str(e)}")
             return None
 
+        if reusable:
+            presigned_url_cache.set(cache_key, (url, now + expiration))
+        return url
+
 
 def get_storage_provider() -> FileSystemStorage | S3Storage:
     """Get the appropriate storage provider based on configuration"""
@@ -2,13 +2,15 @@ import io
 import os
 import sys
 from collections.abc import AsyncGenerator, Generator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import boto3
+import httpx
 import pytest
 import pytest_asyncio
+from botocore.config import Config
 from fastapi import FastAPI, UploadFile
-from fastapi.testclient import TestClient
 from moto import mock_aws
 
 # Add backend directory to Python path
@@ -20,13 +22,169 @@ from app.db.dynamodb_session import DynamoDBSession
 from app.db.session import get_db
 from app.main import create_application
 from app.models.user import User
-from app.services.user import user_service
-
-
-@pytest.fixture(scope="function")
-def mock_aws_services():
+from app.services.integration import integration_cache
+from app.services.user import user_cache, user_service
+from app.utils.storage_factory import presigned_url_cache
+
+# Table definitions mirroring infra/aws/database/dynamodb.yaml (on-demand billing)
+TABLE_SPECS = [
+    # Users table
+    dict(
+        TableName=settings.DYNAMODB_USERS_TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "S"},
+            {"AttributeName": "email", "AttributeType": "S"},
+            {"AttributeName": "google_id", "AttributeType": "S"},
+            {"AttributeName": "username", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "EmailIndex",
+                "KeySchema": [{"AttributeName": "email", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": "GoogleIdIndex",
+                "KeySchema": [{"AttributeName": "google_id", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": "UsernameIndex",
+                "KeySchema": [{"AttributeName": "username", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    ),
+    # Documents table
+    dict(
+        TableName=settings.DYNAMODB_DOCUMENTS_TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "S"},
+            {"AttributeName": "owner_id", "AttributeType": "S"},
+            {"AttributeName": "is_deleted", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "OwnerIndex",
+                "KeySchema": [
+                    {"AttributeName": "owner_id", "KeyType": "HASH"},
+                    {"AttributeName": "is_deleted", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    ),
+    # Folders table
+    dict(
+        TableName=settings.DYNAMODB_FOLDERS_TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "S"},
+            {"AttributeName": "owner_id", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "OwnerIndex",
+                "KeySchema": [{"AttributeName": "owner_id", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    ),
+    # Integrations table
+    dict(
+        TableName=settings.DYNAMODB_INTEGRATIONS_TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "S"},
+            {"AttributeName": "user_id", "AttributeType": "S"},
+            {"AttributeName": "token_expiry", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "UserIndex",
+                "KeySchema": [{"AttributeName": "user_id", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": "UserTokenExpiryIndex",
+                "KeySchema": [
+                    {"AttributeName": "user_id", "KeyType": "HASH"},
+                    {"AttributeName": "token_expiry", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    ),
+    # Document Shares table
+    dict(
+        TableName=settings.DYNAMODB_DOCUMENT_SHARES_TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "S"},
+            {"AttributeName": "document_id", "AttributeType": "S"},
+            {"AttributeName": "user_id", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "DocumentIndex",
+                "KeySchema": [{"AttributeName": "document_id", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": "UserSharesIndex",
+                "KeySchema": [{"AttributeName": "user_id", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    ),
+    # Document Versions table
+    dict(
+        TableName=settings.DYNAMODB_DOCUMENT_VERSIONS_TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "S"},
+            {"AttributeName": "document_id", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "DocumentVersionsIndex",
+                "KeySchema": [{"AttributeName": "document_id", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    ),
+]
+
+TEST_TABLES = tuple(spec["TableName"] for spec in TABLE_SPECS)
+
+# Fixed identity for the test user, hashed once at import time
+TEST_USER_ID = "00000000-0000-4000-8000-000000000001"
+_TEST_USER_PASSWORD_HASH = get_password_hash("testpassword123")
+
+# Upload payloads shared by every test; BytesIO wraps them without copying
+_TXT_BYTES = b"This is a test file content for unit testing."
+# Minimal valid PDF content
+_PDF_BYTES = b"%PDF-1.4\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n2 0 obj\n<<\n/Type /Pages\n/Kids [3 0 R]\n/Count 1\n>>\nendobj\n3 0 obj\n<<\n/Type /Page\n/Parent 2 0 R\n/Resources <<\n/Font <<\n/F1 4 0 R\n>>\n>>\n/MediaBox [0 0 612 792]\n/Contents 5 0 R\n>>\nendobj\n4 0 obj\n<<\n/Type /Font\n/Subtype /Type1\n/BaseFont /Helvetica\n>>\nendobj\n5 0 obj\n<<\n/Length 44\n>>\nstream\nBT\n/F1 12 Tf\n100 700 Td\n(Test PDF) Tj\nET\nendstream\nendobj\nxref\n0 6\n0000000000 65535 f\n0000000009 00000 n\n0000000058 00000 n\n0000000115 00000 n\n0000000262 00000 n\n0000000341 00000 n\ntrailer\n<<\n/Size 6\n/Root 1 0 R\n>>\nstartxref\n431\n%%EOF"
+
+
+# moto answers in-process, so test clients fail fast instead of retrying
+TEST_AWS_CONFIG = Config(
+    retries={"max_attempts": 1}, connect_timeout=0.5, read_timeout=2.0
+)
+
+
+@pytest.fixture(scope="session")
+def aws_mock_session():
     """
-    Mock AWS services (DynamoDB and S3) for all tests
+    Mock AWS services (DynamoDB and S3) and create tables once per session
     """
     # Set environment variables for mocked AWS
     os.environ["AWS_REGION"] = "us-east-1"
@@ -35,153 +193,13 @@ def mock_aws_services():
 
     with mock_aws():
         # Create DynamoDB resource
-        dynamodb = boto3.resource("dynamodb", region_name=settings.AWS_REGION)
-
-        # Create Users table
-        dynamodb.create_table(
-            TableName=settings.DYNAMODB_USERS_TABLE,
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "id", "AttributeType": "S"},
-                {"AttributeName": "email", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "EmailIndex",
-                    "KeySchema": [{"AttributeName": "email", "KeyType": "HASH"}],
-                    "Projection": {"ProjectionType": "ALL"},
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 5,
-                        "WriteCapacityUnits": 5,
-                    },
-                }
-            ],
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
+        dynamodb = boto3.resource(
+            "dynamodb", region_name=settings.AWS_REGION, config=TEST_AWS_CONFIG
         )
 
-        # Create Documents table
-        dynamodb.create_table(
-            TableName=settings.DYNAMODB_DOCUMENTS_TABLE,
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "id", "AttributeType": "S"},
-                {"AttributeName": "owner_id", "AttributeType": "S"},
-                {"AttributeName": "is_deleted", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "OwnerIndex",
-                    "KeySchema": [
-                        {"AttributeName": "owner_id", "KeyType": "HASH"},
-                        {"AttributeName": "is_deleted", "KeyType": "RANGE"},
-                    ],
-                    "Projection": {"ProjectionType": "ALL"},
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 5,
-                        "WriteCapacityUnits": 5,
-                    },
-                }
-            ],
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
-        )
-
-        # Create Folders table
-        dynamodb.create_table(
-            TableName=settings.DYNAMODB_FOLDERS_TABLE,
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "id", "AttributeType": "S"},
-                {"AttributeName": "owner_id", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "OwnerIndex",
-                    "KeySchema": [{"AttributeName": "owner_id", "KeyType": "HASH"}],
-                    "Projection": {"ProjectionType": "ALL"},
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 5,
-                        "WriteCapacityUnits": 5,
-                    },
-                }
-            ],
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
-        )
-
-        # Create Integrations table
-        dynamodb.create_table(
-            TableName=settings.DYNAMODB_INTEGRATIONS_TABLE,
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "id", "AttributeType": "S"},
-                {"AttributeName": "user_id", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "UserIndex",
-                    "KeySchema": [{"AttributeName": "user_id", "KeyType": "HASH"}],
-                    "Projection": {"ProjectionType": "ALL"},
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 5,
-                        "WriteCapacityUnits": 5,
-                    },
-                }
-            ],
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
-        )
-
-        # Create Document Shares table
-        dynamodb.create_table(
-            TableName=settings.DYNAMODB_DOCUMENT_SHARES_TABLE,
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "id", "AttributeType": "S"},
-                {"AttributeName": "document_id", "AttributeType": "S"},
-                {"AttributeName": "user_id", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "DocumentIndex",
-                    "KeySchema": [{"AttributeName": "document_id", "KeyType": "HASH"}],
-                    "Projection": {"ProjectionType": "ALL"},
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 5,
-                        "WriteCapacityUnits": 5,
-                    },
-                },
-                {
-                    "IndexName": "UserSharesIndex",
-                    "KeySchema": [{"AttributeName": "user_id", "KeyType": "HASH"}],
-                    "Projection": {"ProjectionType": "ALL"},
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 5,
-                        "WriteCapacityUnits": 5,
-                    },
-                },
-            ],
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
-        )
-
-        # Create Document Versions table
-        dynamodb.create_table(
-            TableName=settings.DYNAMODB_DOCUMENT_VERSIONS_TABLE,
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "id", "AttributeType": "S"},
-                {"AttributeName": "document_id", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "DocumentVersionsIndex",
-                    "KeySchema": [{"AttributeName": "document_id", "KeyType": "HASH"}],
-                    "Projection": {"ProjectionType": "ALL"},
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 5,
-                        "WriteCapacityUnits": 5,
-                    },
-                }
-            ],
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
-        )
+        # Create DynamoDB tables concurrently
+        with ThreadPoolExecutor(max_workers=len(TABLE_SPECS)) as executor:
+            list(executor.map(lambda spec: dynamodb.create_table(**spec), TABLE_SPECS))
 
         # Create S3 bucket
         s3_client = boto3.client(
@@ -189,10 +207,61 @@ def mock_aws_services():
             region_name=settings.AWS_REGION,
             aws_access_key_id="testing",
             aws_secret_access_key="testing",
+            config=TEST_AWS_CONFIG,
         )
         s3_client.create_bucket(Bucket=settings.S3_BUCKET)
 
-        yield
+        # Hand the client to mock_s3 so tests reuse one initialised instance
+        yield s3_client
+
+
+@pytest.fixture(scope="session")
+def dynamodb_resource(aws_mock_session):
+    """
+    Get a DynamoDB resource bound to the session's AWS mock
+    """
+    return boto3.resource(
+        "dynamodb", region_name=settings.AWS_REGION, config=TEST_AWS_CONFIG
+    )
+
+
+@pytest.fixture(scope="function")
+def mock_aws_services(aws_mock_session, dynamodb_resource):
+    """
+    Give each test empty tables and an empty bucket in the shared AWS mock
+    """
+    for table_name in TEST_TABLES:
+        table = dynamodb_resource.Table(table_name)
+        scan_kwargs = {"ProjectionExpression": "id"}
+        with table.batch_writer() as batch:
+            while True:
+                response = table.scan(**scan_kwargs)
+                for item in response.get("Items", []):
+                    batch.delete_item(Key={"id": item["id"]})
+                if "LastEvaluatedKey" not in response:
+                    break
+                scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    s3_client = aws_mock_session
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=settings.S3_BUCKET):
+        objects = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+        if objects:
+            s3_client.delete_objects(
+                Bucket=settings.S3_BUCKET, Delete={"Objects": objects}
+            )
+
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_service_caches():
+    """
+    Drop users, integrations and download URLs cached by earlier tests
+    """
+    user_cache.clear()
+    integration_cache.clear()
+    presigned_url_cache.clear()
 
 
 @pytest_asyncio.fixture
@@ -205,48 +274,71 @@ async def db(mock_aws_services) -> AsyncGenerator[DynamoDBSession, None]:
     yield session
 
 
-@pytest.fixture(scope="function")
-def app(db: DynamoDBSession) -> Generator[FastAPI, None, None]:
+@pytest.fixture(scope="session")
+def session_app(aws_mock_session) -> FastAPI:
     """
-    Create a fresh database on each test case.
+    Build the application once per session against the mocked AWS backend
     """
     app = create_application()
 
     # Override get_db dependency
     async def override_get_db():
-        try:
-            yield db
-        finally:
-            pass  # No need to close DynamoDB session
+        # Sessions are thin wrappers over the shared boto3 resource
+        yield DynamoDBSession()
 
     app.dependency_overrides[get_db] = override_get_db
+    return app
 
-    yield app
 
-    app.dependency_overrides.clear()
+@pytest.fixture(scope="function")
+def stateless_app(session_app: FastAPI) -> Generator[FastAPI, None, None]:
+    """
+    Give each test the shared application without resetting AWS state
+    """
+    overrides = dict(session_app.dependency_overrides)
+
+    yield session_app
+
+    # Drop overrides added by the test, such as get_current_user
+    session_app.dependency_overrides.clear()
+    session_app.dependency_overrides.update(overrides)
 
 
 @pytest.fixture(scope="function")
-def client(app: FastAPI) -> Generator[TestClient, None, None]:
+def app(stateless_app: FastAPI, db: DynamoDBSession) -> FastAPI:
     """
-    Create a test client for testing API endpoints.
+    Give each test the shared application with empty tables
     """
-    with TestClient(app) as c:
+    return stateless_app
+
+
+@pytest_asyncio.fixture
+async def client(app: FastAPI) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """
+    Create a test client that calls the app on the test's event loop
+    """
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as c:
         yield c
 
 
 @pytest.fixture(scope="function")
-def mock_s3(mock_aws_services):
+def mock_s3(aws_mock_session, mock_aws_services):
+    """
+    Get the session's S3 client for testing (depends on mock_aws_services)
+    """
+    return aws_mock_session
+
+
+@pytest.fixture(scope="session")
+def test_user_token() -> str:
     """
-    Get S3 client for testing (depends on mock_aws_services)
+    Sign the test user's JWT once per session
     """
-    s3_client = boto3.client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id="testing",
-        aws_secret_access_key="testing",
+    return create_access_token(
+        subject=TEST_USER_ID, expires_delta=timedelta(minutes=30)
     )
-    return s3_client
 
 
 @pytest_asyncio.fixture
@@ -254,29 +346,28 @@ async def test_user(db: DynamoDBSession) -> User:
     """
     Create a test user for authentication testing
     """
-    from app.schemas.user import UserCreate
-
-    user_data = UserCreate(
+    # Insert directly with the precomputed hash; the id is fixed so the
+    # session-scoped token stays valid across the per-test table resets
+    user = User(
+        id=TEST_USER_ID,
         email="test@example.com",
         username="testuser",
-        password="testpassword123",
+        hashed_password=_TEST_USER_PASSWORD_HASH,
         full_name="Test User",
+        auth_provider="local",
     )
-
-    # Create user using the service
-    user = await user_service.create(db, obj_in=user_data)
+    await db.add(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @pytest.fixture
-def auth_headers(test_user: User) -> dict[str, str]:
+def auth_headers(test_user: User, test_user_token: str) -> dict[str, str]:
     """
     Generate authentication headers with JWT token for test user
     """
-    access_token = create_access_token(
-        subject=test_user.id, expires_delta=timedelta(minutes=30)
-    )
-    return {"Authorization": f"Bearer {access_token}"}
+    return {"Authorization": f"Bearer {test_user_token}"}
 
 
 @pytest.fixture
@@ -284,10 +375,9 @@ def sample_file() -> UploadFile:
     """
     Create a sample file for upload testing
     """
-    file_content = b"This is a test file content for unit testing."
     return UploadFile(
         filename="test_document.txt",
-        file=io.BytesIO(file_content),
+        file=io.BytesIO(_TXT_BYTES),
         headers={"content-type": "text/plain"},
     )
 
@@ -297,10 +387,8 @@ def sample_pdf_file() -> UploadFile:
     """
     Create a sample PDF file for upload testing
     """
-    # Minimal valid PDF content
-    pdf_content = b"%PDF-1.4\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n2 0 obj\n<<\n/Type /Pages\n/Kids [3 0 R]\n/Count 1\n>>\nendobj\n3 0 obj\n<<\n/Type /Page\n/Parent 2 0 R\n/Resources <<\n/Font <<\n/F1 4 0 R\n>>\n>>\n/MediaBox [0 0 612 792]\n/Contents 5 0 R\n>>\nendobj\n4 0 obj\n<<\n/Type /Font\n/Subtype /Type1\n/BaseFont /Helvetica\n>>\nendobj\n5 0 obj\n<<\n/Length 44\n>>\nstream\nBT\n/F1 12 Tf\n100 700 Td\n(Test PDF) Tj\nET\nendstream\nendobj\nxref\n0 6\n0000000000 65535 f\n0000000009 00000 n\n0000000058 00000 n\n0000000115 00000 n\n0000000262 00000 n\n0000000341 00000 n\ntrailer\n<<\n/Size 6\n/Root 1 0 R\n>>\nstartxref\n431\n%%EOF"
     return UploadFile(
         filename="test_document.pdf",
-        file=io.BytesIO(pdf_content),
+        file=io.BytesIO(_PDF_BYTES),
         headers={"content-type": "application/pdf"},
     )
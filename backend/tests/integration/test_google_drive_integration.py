@@ -2,13 +2,60 @@ import json
 from datetime import UTC, datetime, timezone
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
 
 from app.api.deps import get_current_user
 from app.models.integration import ExternalIntegration
 from app.models.user import User
 
+# Drive responses shared by the tests; the endpoints only read them
+MOCK_FILES_LIST = [
+    {
+        "id": "file1",
+        "name": "Test File",
+        "mime_type": "text/plain",
+        "is_folder": False,
+    }
+]
+
+
+# These tests patch the service layer, so they skip the per-test table reset
+@pytest.fixture
+def app(stateless_app):
+    """Use the shared app without touching DynamoDB or S3"""
+    return stateless_app
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _patched_services():
+    """Patch the endpoint services once for the whole module"""
+    with (
+        patch(
+            "app.api.api_v1.endpoints.integrations.integration_service"
+        ) as integration_service,
+        patch(
+            "app.api.api_v1.endpoints.integrations.google_drive_service"
+        ) as google_drive_service,
+    ):
+        yield integration_service, google_drive_service
+
+
+@pytest.fixture
+def mock_int_service(_patched_services):
+    """Patched integration service, reset for each test"""
+    service = _patched_services[0]
+    service.reset_mock(return_value=True, side_effect=True)
+    return service
+
+
+@pytest.fixture
+def mock_drive_service(_patched_services):
+    """Patched Google Drive service, reset for each test"""
+    service = _patched_services[1]
+    service.reset_mock(return_value=True, side_effect=True)
+    return service
+
 
 @pytest.fixture
 def mock_user():
@@ -43,144 +90,123 @@ def auth_headers():
 
 
 @pytest.mark.asyncio
-async def test_google_drive_start_link(client, app, mock_user):
+async def test_google_drive_start_link(client, app, mock_user, mock_drive_service):
     """Test the start_google_drive_link endpoint"""
     # Override auth dependency
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
-    with patch(
-        "app.api.api_v1.endpoints.integrations.google_drive_service"
-    ) as mock_service:
-        # Mock the authorization URL
-        mock_service.get_authorization_url.return_value = (
-            "https://accounts.google.com/o/oauth2/auth?test=1"
-        )
+    # Mock the authorization URL
+    mock_drive_service.get_authorization_url.return_value = (
+        "https://accounts.google.com/o/oauth2/auth?test=1"
+    )
 
-        # Make request to endpoint
-        response = client.post(
-            "/api/v1/integrations/google/link",
-            headers={"Authorization": "Bearer fake_token"},
-        )
+    # Make request to endpoint
+    response = await client.post(
+        "/api/v1/integrations/google/link",
+        headers={"Authorization": "Bearer fake_token"},
+    )
 
-        # Verify response
-        assert response.status_code == 200
-        data = response.json()
-        assert "authorization_url" in data
-        assert "https://accounts.google.com" in data["authorization_url"]
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert "authorization_url" in data
+    assert "https://accounts.google.com" in data["authorization_url"]
 
 
 @pytest.mark.asyncio
-async def test_google_drive_status_connected(client, app, mock_user, mock_integration):
+async def test_google_drive_status_connected(
+    client, app, mock_user, mock_integration, mock_int_service
+):
     """Test the get_google_drive_status endpoint when connected"""
     # Override auth dependency
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
-    with patch(
-        "app.api.api_v1.endpoints.integrations.integration_service"
-    ) as mock_service:
-        # Mock the get_by_user_and_provider method
-        mock_service.get_by_user_and_provider = AsyncMock(return_value=mock_integration)
+    # Mock the get_by_user_and_provider method
+    mock_int_service.get_by_user_and_provider = AsyncMock(return_value=mock_integration)
 
-        # Make request to endpoint
-        response = client.get(
-            "/api/v1/integrations/google/status",
-            headers={"Authorization": "Bearer fake_token"},
-        )
+    # Make request to endpoint
+    response = await client.get(
+        "/api/v1/integrations/google/status",
+        headers={"Authorization": "Bearer fake_token"},
+    )
 
-        # Verify response
-        assert response.status_code == 200
-        data = response.json()
-        assert data["connected"] is True
-        assert data["user_email"] == "google-user@example.com"
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert data["connected"] is True
+    assert data["user_email"] == "google-user@example.com"
 
 
 @pytest.mark.asyncio
-async def test_google_drive_status_not_connected(client, app, mock_user):
+async def test_google_drive_status_not_connected(
+    client, app, mock_user, mock_int_service
+):
     """Test the get_google_drive_status endpoint when not connected"""
     # Override auth dependency
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
-    with patch(
-        "app.api.api_v1.endpoints.integrations.integration_service"
-    ) as mock_service:
-        # Mock the get_by_user_and_provider method
-        mock_service.get_by_user_and_provider = AsyncMock(return_value=None)
+    # Mock the get_by_user_and_provider method
+    mock_int_service.get_by_user_and_provider = AsyncMock(return_value=None)
 
-        # Make request to endpoint
-        response = client.get(
-            "/api/v1/integrations/google/status",
-            headers={"Authorization": "Bearer fake_token"},
-        )
+    # Make request to endpoint
+    response = await client.get(
+        "/api/v1/integrations/google/status",
+        headers={"Authorization": "Bearer fake_token"},
+    )
 
-        # Verify response
-        assert response.status_code == 200
-        data = response.json()
-        assert data["connected"] is False
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert data["connected"] is False
 
 
 @pytest.mark.asyncio
-async def test_disconnect_google_drive(client, app, mock_user):
+async def test_disconnect_google_drive(client, app, mock_user, mock_int_service):
     """Test the disconnect_google_drive endpoint"""
     # Override auth dependency
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
-    with patch(
-        "app.api.api_v1.endpoints.integrations.integration_service"
-    ) as mock_service:
-        # Mock the delete_by_user_and_provider method
-        mock_service.delete_by_user_and_provider = AsyncMock()
+    # Mock the delete_by_user_and_provider method
+    mock_int_service.delete_by_user_and_provider = AsyncMock()
 
-        # Make request to endpoint
-        response = client.delete(
-            "/api/v1/integrations/google/disconnect",
-            headers={"Authorization": "Bearer fake_token"},
-        )
+    # Make request to endpoint
+    response = await client.delete(
+        "/api/v1/integrations/google/disconnect",
+        headers={"Authorization": "Bearer fake_token"},
+    )
 
-        # Verify response
-        assert response.status_code == 204
-        mock_service.delete_by_user_and_provider.assert_called_once()
+    # Verify response
+    assert response.status_code == 204
+    mock_int_service.delete_by_user_and_provider.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_list_google_drive_files(client, app, mock_user, mock_integration):
+async def test_list_google_drive_files(
+    client, app, mock_user, mock_integration, mock_int_service, mock_drive_service
+):
     """Test the list_google_drive_files endpoint"""
     # Override auth dependency
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
-    with (
-        patch(
-            "app.api.api_v1.endpoints.integrations.integration_service"
-        ) as mock_int_service,
-        patch(
-            "app.api.api_v1.endpoints.integrations.google_drive_service"
-        ) as mock_drive_service,
-    ):
-        # Mock the service methods
-        mock_int_service.get_by_user_and_provider = AsyncMock(
-            return_value=mock_integration
-        )
-
-        # Mock list_files
-        mock_files = [
-            {
-                "id": "file1",
-                "name": "Test File",
-                "mime_type": "text/plain",
-                "is_folder": False,
-            }
-        ]
-        mock_drive_service.list_files = AsyncMock(return_value=(mock_files, None))
-        mock_drive_service.get_file_metadata = AsyncMock(return_value=None)
-
-        # Make request to endpoint
-        response = client.get(
-            "/api/v1/integrations/google/files",
-            headers={"Authorization": "Bearer fake_token"},
-        )
-
-        # Verify response
-        assert response.status_code == 200
-        data = response.json()
-        assert "files" in data
-        assert len(data["files"]) == 1
-        assert data["files"][0]["name"] == "Test File"
+    # Mock the service methods
+    mock_int_service.get_active_by_user_and_provider = AsyncMock(
+        return_value=mock_integration
+    )
+
+    # Mock the token refresh and list_files
+    mock_drive_service.ensure_fresh_token = AsyncMock(return_value=mock_integration)
+    mock_drive_service.list_files = AsyncMock(return_value=(MOCK_FILES_LIST, None))
+    mock_drive_service.get_file_metadata = AsyncMock(return_value=None)
+
+    # Make request to endpoint
+    response = await client.get(
+        "/api/v1/integrations/google/files",
+        headers={"Authorization": "Bearer fake_token"},
+    )
+
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert "files" in data
+    assert len(data["files"]) == 1
+    assert data["files"][0]["name"] == "Test File"
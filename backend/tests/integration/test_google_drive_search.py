@@ -1,13 +1,70 @@
 import json
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
 
 from app.api.deps import get_current_user
 from app.models.integration import ExternalIntegration
 from app.models.user import User
 
+# Drive responses shared by the tests; the endpoints only read them
+MOCK_FILES_LIST = [
+    {
+        "id": "file1",
+        "name": "Test Document.pdf",
+        "mime_type": "application/pdf",
+        "is_folder": False,
+    }
+]
+
+MOCK_FILE_META = {
+    "id": "test-file-id",
+    "name": "Important Document.docx",
+    "mime_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "size": 12345,
+    "is_folder": False,
+    "web_view_link": "https://docs.google.com/document/d/file/view",
+    "thumbnail_link": "https://drive.google.com/thumbnail?id=file",
+}
+
+
+# These tests patch the service layer, so they skip the per-test table reset
+@pytest.fixture
+def app(stateless_app):
+    """Use the shared app without touching DynamoDB or S3"""
+    return stateless_app
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _patched_services():
+    """Patch the endpoint services once for the whole module"""
+    with (
+        patch(
+            "app.api.api_v1.endpoints.integrations.integration_service"
+        ) as integration_service,
+        patch(
+            "app.api.api_v1.endpoints.integrations.google_drive_service"
+        ) as google_drive_service,
+    ):
+        yield integration_service, google_drive_service
+
+
+@pytest.fixture
+def mock_int_service(_patched_services):
+    """Patched integration service, reset for each test"""
+    service = _patched_services[0]
+    service.reset_mock(return_value=True, side_effect=True)
+    return service
+
+
+@pytest.fixture
+def mock_drive_service(_patched_services):
+    """Patched Google Drive service, reset for each test"""
+    service = _patched_services[1]
+    service.reset_mock(return_value=True, side_effect=True)
+    return service
+
 
 @pytest.fixture
 def mock_user():
@@ -36,93 +93,64 @@ def mock_integration():
 
 
 @pytest.mark.asyncio
-async def test_search_google_drive(client, app, mock_user, mock_integration):
+async def test_search_google_drive(
+    client, app, mock_user, mock_integration, mock_int_service, mock_drive_service
+):
     """Test searching files in Google Drive"""
     # Override auth dependency
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
-    with (
-        patch(
-            "app.api.api_v1.endpoints.integrations.integration_service"
-        ) as mock_int_service,
-        patch(
-            "app.api.api_v1.endpoints.integrations.google_drive_service"
-        ) as mock_drive_service,
-    ):
-        # Mock the service methods
-        mock_int_service.get_by_user_and_provider = AsyncMock(
-            return_value=mock_integration
-        )
-
-        # Mock search results
-        mock_files = [
-            {
-                "id": "file1",
-                "name": "Test Document.pdf",
-                "mime_type": "application/pdf",
-                "is_folder": False,
-            }
-        ]
-        mock_drive_service.search_files = AsyncMock(return_value=(mock_files, None))
-
-        # Make request to endpoint
-        response = client.get(
-            "/api/v1/integrations/google/search?query=test",
-            headers={"Authorization": "Bearer fake_token"},
-        )
-
-        # Verify response
-        assert response.status_code == 200
-        data = response.json()
-        assert "files" in data
-        assert len(data["files"]) == 1
-        assert data["files"][0]["name"] == "Test Document.pdf"
+    # Mock the service methods
+    mock_int_service.get_active_by_user_and_provider = AsyncMock(
+        return_value=mock_integration
+    )
+
+    # Mock search results
+    mock_drive_service.search_files = AsyncMock(return_value=(MOCK_FILES_LIST, None))
+
+    # Make request to endpoint
+    response = await client.get(
+        "/api/v1/integrations/google/search?query=test",
+        headers={"Authorization": "Bearer fake_token"},
+    )
+
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert "files" in data
+    assert len(data["files"]) == 1
+    assert data["files"][0]["name"] == "Test Document.pdf"
 
 
 @pytest.mark.asyncio
-async def test_get_google_drive_file(client, app, mock_user, mock_integration):
+async def test_get_google_drive_file(
+    client, app, mock_user, mock_integration, mock_int_service, mock_drive_service
+):
     """Test getting a specific file from Google Drive"""
     # Override auth dependency
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
-    file_id = "test-file-id"
+    file_id = MOCK_FILE_META["id"]
 
-    with (
-        patch(
-            "app.api.api_v1.endpoints.integrations.integration_service"
-        ) as mock_int_service,
-        patch(
-            "app.api.api_v1.endpoints.integrations.google_drive_service"
-        ) as mock_drive_service,
-    ):
-        # Mock the service methods
-        mock_int_service.get_by_user_and_provider = AsyncMock(
-            return_value=mock_integration
-        )
-
-        # Mock file metadata
-        mock_file = {
-            "id": file_id,
-            "name": "Important Document.docx",
-            "mime_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "size": 12345,
-            "is_folder": False,
-            "web_view_link": "https://docs.google.com/document/d/file/view",
-            "thumbnail_link": "https://drive.google.com/thumbnail?id=file",
-        }
-        mock_drive_service.get_file_metadata = AsyncMock(return_value=mock_file)
-
-        # Make request to endpoint
-        response = client.get(
-            f"/api/v1/integrations/google/files/{file_id}",
-            headers={"Authorization": "Bearer fake_token"},
-        )
-
-        # Verify response
-        assert response.status_code == 200
-        data = response.json()
-        assert data["id"] == file_id
-        assert data["name"] == "Important Document.docx"
+    # Mock the service methods
+    mock_int_service.get_active_by_user_and_provider = AsyncMock(
+        return_value=mock_integration
+    )
+
+    # Mock file metadata
+    mock_drive_service.get_file_metadata = AsyncMock(return_value=MOCK_FILE_META)
+
+    # Make request to endpoint
+    response = await client.get(
+        f"/api/v1/integrations/google/files/{file_id}",
+        headers={"Authorization": "Bearer fake_token"},
+    )
+
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == file_id
+    assert data["name"] == "Important Document.docx"
 
 
 # Note: The import test has been disabled because it requires additional mocking
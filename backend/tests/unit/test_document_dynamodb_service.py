@@ -0,0 +1,39 @@
+"""Unit tests for the DynamoDB document service"""
+
+import pytest
+
+from app.services.document_dynamodb_service import document_service
+
+
+@pytest.mark.asyncio
+async def test_create_documents_writes_documents_and_versions(mock_aws_services):
+    # Arrange
+    documents = [
+        {
+            "user_id": "batch-owner-id",
+            "name": f"Imported {i}.pdf",
+            "description": "Imported from Google Drive",
+            "file_path": f"imported-{i}.pdf",
+            "file_type": "application/pdf",
+            "file_size": 100 + i,
+            "folder_id": "batch-folder-id",
+        }
+        for i in range(30)
+    ]
+
+    # Act
+    document_ids = await document_service.create_documents(documents)
+
+    # Assert
+    assert len(document_ids) == 30
+    stored = await document_service.get_multi_by_owner(owner_id="batch-owner-id")
+    assert {doc.id for doc in stored} == set(document_ids)
+
+    first = await document_service.get(document_ids[0])
+    assert first.name == "Imported 0.pdf"
+    assert first.folder_id == "batch-folder-id"
+
+    versions = await document_service.get_versions(document_ids[0])
+    assert len(versions) == 1
+    assert versions[0].version_number == 1
+    assert versions[0].file_path == "imported-0.pdf"
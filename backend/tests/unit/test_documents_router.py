@@ -1,174 +1,157 @@
 """Unit tests for documents router endpoints"""
 
+import asyncio
 import os
 import sys
+from types import SimpleNamespace
 
+import httpx
 import pytest
 from fastapi import status
-from fastapi.testclient import TestClient
 
 # Add tests directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app.api.api_v1.endpoints.documents import _upload_size
+from app.core.config import settings
 from app.db.dynamodb_session import DynamoDBSession
-from app.models.user import User
-from tests.utils.assertions import assert_response_has_keys, assert_status_code
 from tests.utils.factories import create_test_file
 
+# Shared upload body for tests that only need a small text file
+_SAMPLE_BYTES = b"Test file content"
 
-class TestDocumentCreation:
-    """Tests for POST /documents endpoint"""
+_BOUNDARY = "----data-room-test-boundary"
 
-    @pytest.mark.asyncio
-    async def test_create_document_success(
-        self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        sample_file,
-        mock_s3,
-        db: DynamoDBSession,
-    ):
-        """Test successful document creation with file upload"""
-        # Arrange
-        document_data = {
-            "name": "Test Document",
-            "description": "A test document",
-            "is_public": False,
-        }
 
-        # Act
-        response = client.post(
-            "/api/v1/documents",
-            headers=auth_headers,
-            data=document_data,
-            files={"file": ("test.txt", sample_file.file, "text/plain")},
-        )
+def _multipart_body(fields: dict[str, str], filename: str, content: bytes) -> bytes:
+    """Encode form fields plus one text/plain file part as a multipart body"""
+    parts = [
+        f'--{_BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+        f"{value}\r\n".encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f"--{_BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: text/plain\r\n\r\n".encode()
+    )
+    return b"".join(parts) + content + f"\r\n--{_BOUNDARY}--\r\n".encode()
 
-        # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
-        data = response.json()
-        assert_response_has_keys(
-            data, ["id", "name", "file_path", "file_type", "file_size", "owner_id"]
-        )
-        assert data["name"] == "Test Document"
-        assert data["description"] == "A test document"
-        assert data["is_public"] is False
 
-    @pytest.mark.asyncio
-    async def test_create_document_with_folder(
-        self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        sample_file,
-        mock_s3,
-        db: DynamoDBSession,
-    ):
-        """Test document creation with folder assignment"""
-        # Arrange
-        folder_id = "test-folder-id"
-        document_data = {
-            "name": "Document in Folder",
-            "folder_id": folder_id,
-        }
+@pytest.fixture
+def env(
+    client: httpx.AsyncClient,
+    auth_headers: dict[str, str],
+    mock_s3,
+    db: DynamoDBSession,
+) -> SimpleNamespace:
+    """Authenticated client plus the storage fixtures the upload tests rely on"""
+    return SimpleNamespace(client=client, headers=auth_headers, s3=mock_s3, db=db)
 
-        # Act
-        response = client.post(
-            "/api/v1/documents",
-            headers=auth_headers,
-            data=document_data,
-            files={"file": ("test.txt", sample_file.file, "text/plain")},
-        )
 
-        # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
-        data = response.json()
-        assert data["folder_id"] == folder_id
+class TestDocumentCreation:
+    """Tests for POST /documents endpoint"""
 
     @pytest.mark.asyncio
-    async def test_create_public_document(
+    @pytest.mark.parametrize(
+        "document_data",
+        [
+            {
+                "name": "Test Document",
+                "description": "A test document",
+                "is_public": False,
+            },
+            {"name": "Document in Folder", "folder_id": "test-folder-id"},
+            {"name": "Public Document", "is_public": True},
+        ],
+        ids=["private", "in_folder", "public"],
+    )
+    async def test_create_document(
         self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        sample_file,
-        mock_s3,
-        db: DynamoDBSession,
+        env: SimpleNamespace,
+        document_data: dict,
     ):
-        """Test creating a public document"""
-        # Arrange
-        document_data = {
-            "name": "Public Document",
-            "is_public": True,
-        }
-
+        """Test document creation echoes the submitted form fields"""
         # Act
-        response = client.post(
+        response = await env.client.post(
             "/api/v1/documents",
-            headers=auth_headers,
+            headers=env.headers,
             data=document_data,
-            files={"file": ("test.txt", sample_file.file, "text/plain")},
+            files={"file": ("test.txt", _SAMPLE_BYTES, "text/plain")},
         )
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
+        assert response.status_code == status.HTTP_200_OK, response.text
         data = response.json()
-        assert data["is_public"] is True
+        assert {
+            "id",
+            "name",
+            "file_path",
+            "file_type",
+            "file_size",
+            "owner_id",
+        } <= data.keys()
+        for key, expected in document_data.items():
+            assert data[key] == expected
+        with open(data["file_path"], "rb") as f:
+            assert f.read() == _SAMPLE_BYTES
 
     @pytest.mark.asyncio
     async def test_create_document_file_too_large(
         self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        mock_s3,
-        db: DynamoDBSession,
+        env: SimpleNamespace,
+        monkeypatch: pytest.MonkeyPatch,
     ):
         """Test rejection of oversized file"""
-        # Arrange
-        large_content = b"x" * (20 * 1024 * 1024)  # 20MB (exceeds 16MB limit)
-        large_file = create_test_file(
-            filename="large_file.txt",
-            content=large_content,
+        # Arrange - shrink the limit so a small body exercises the same check
+        monkeypatch.setattr(settings, "MAX_CONTENT_LENGTH", 1024)
+        body = _multipart_body(
+            {"name": "Large Document"},
+            "large.txt",
+            b"x" * (settings.MAX_CONTENT_LENGTH + 1),
         )
 
-        document_data = {
-            "name": "Large Document",
-        }
-
-        # Act
-        response = client.post(
+        # Act - send the pre-encoded body rather than re-encoding it per request
+        response = await env.client.post(
             "/api/v1/documents",
-            headers=auth_headers,
-            data=document_data,
-            files={"file": ("large.txt", large_file.file, "text/plain")},
+            headers={
+                **env.headers,
+                "Content-Type": f"multipart/form-data; boundary={_BOUNDARY}",
+            },
+            content=body,
         )
 
         # Assert
-        assert_status_code(
-            response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, (
+            response.text
         )
 
+    @pytest.mark.asyncio
+    async def test_upload_size_without_declared_size(self):
+        """Test the size fallback seeks the upload instead of reading it"""
+        # Arrange - uploads built outside a request carry no size
+        upload = create_test_file(content=_SAMPLE_BYTES)
+
+        # Act
+        size = await _upload_size(upload)
+
+        # Assert - the stream is rewound for the copy that follows
+        assert size == len(_SAMPLE_BYTES)
+        assert await upload.read() == _SAMPLE_BYTES
+
     @pytest.mark.asyncio
     async def test_create_document_unauthenticated(
         self,
-        client: TestClient,
-        sample_file,
+        client: httpx.AsyncClient,
         mock_s3,
         db: DynamoDBSession,
     ):
         """Test rejection of unauthenticated request"""
-        # Arrange
-        document_data = {
-            "name": "Test Document",
-        }
-
-        # Act
-        response = client.post(
-            "/api/v1/documents",
-            data=document_data,
-            files={"file": ("test.txt", sample_file.file, "text/plain")},
-        )
+        # Act - auth is checked before the form is read, so no body is needed
+        response = await client.post("/api/v1/documents")
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED, response.text
 
 
 class TestDocumentListing:
@@ -177,33 +160,28 @@ class TestDocumentListing:
     @pytest.mark.asyncio
     async def test_list_user_documents(
         self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        test_user: User,
-        mock_s3,
-        db: DynamoDBSession,
+        env: SimpleNamespace,
     ):
         """Test listing user's documents"""
         # Arrange - Create a document first
-        sample_file = create_test_file()
         document_data = {"name": "Test Document"}
 
-        create_response = client.post(
+        create_response = await env.client.post(
             "/api/v1/documents",
-            headers=auth_headers,
+            headers=env.headers,
             data=document_data,
-            files={"file": ("test.txt", sample_file.file, "text/plain")},
+            files={"file": ("test.txt", _SAMPLE_BYTES, "text/plain")},
         )
         assert create_response.status_code == status.HTTP_200_OK
 
         # Act
-        response = client.get(
+        response = await env.client.get(
             "/api/v1/documents",
-            headers=auth_headers,
+            headers=env.headers,
         )
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
+        assert response.status_code == status.HTTP_200_OK, response.text
         data = response.json()
         assert isinstance(data, list)
         assert len(data) >= 1
@@ -212,19 +190,17 @@ class TestDocumentListing:
     @pytest.mark.asyncio
     async def test_list_documents_empty(
         self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        db: DynamoDBSession,
+        env: SimpleNamespace,
     ):
         """Test listing documents for user with no documents"""
         # Act
-        response = client.get(
+        response = await env.client.get(
             "/api/v1/documents",
-            headers=auth_headers,
+            headers=env.headers,
         )
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
+        assert response.status_code == status.HTTP_200_OK, response.text
         data = response.json()
         assert isinstance(data, list)
         assert len(data) == 0
@@ -232,32 +208,32 @@ class TestDocumentListing:
     @pytest.mark.asyncio
     async def test_list_documents_with_pagination(
         self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        mock_s3,
-        db: DynamoDBSession,
+        env: SimpleNamespace,
     ):
         """Test pagination parameters"""
-        # Arrange - Create multiple documents
-        for i in range(5):
-            sample_file = create_test_file(filename=f"test{i}.txt")
-            document_data = {"name": f"Document {i}"}
-            client.post(
-                "/api/v1/documents",
-                headers=auth_headers,
-                data=document_data,
-                files={"file": (f"test{i}.txt", sample_file.file, "text/plain")},
+        # Arrange - Build the upload payloads, then create the documents concurrently
+        payloads = [(f"Document {i}", f"test{i}.txt") for i in range(5)]
+        await asyncio.gather(
+            *(
+                env.client.post(
+                    "/api/v1/documents",
+                    headers=env.headers,
+                    data={"name": name},
+                    files={"file": (filename, _SAMPLE_BYTES, "text/plain")},
+                )
+                for name, filename in payloads
             )
+        )
 
         # Act
-        response = client.get(
+        response = await env.client.get(
             "/api/v1/documents",
-            headers=auth_headers,
+            headers=env.headers,
             params={"skip": 2, "limit": 2},
         )
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
+        assert response.status_code == status.HTTP_200_OK, response.text
         data = response.json()
         assert isinstance(data, list)
         assert len(data) <= 2
@@ -265,47 +241,37 @@ class TestDocumentListing:
     @pytest.mark.asyncio
     async def test_list_documents_by_folder(
         self,
-        client: TestClient,
-        auth_headers: dict[str, str],
-        mock_s3,
-        db: DynamoDBSession,
+        env: SimpleNamespace,
     ):
         """Test filtering documents by folder_id"""
         # Arrange
         folder_id = "test-folder-123"
 
-        # Create document in folder
-        sample_file = create_test_file()
-        document_data = {
-            "name": "Document in Folder",
-            "folder_id": folder_id,
-        }
-        client.post(
-            "/api/v1/documents",
-            headers=auth_headers,
-            data=document_data,
-            files={"file": ("test.txt", sample_file.file, "text/plain")},
-        )
-
-        # Create document not in folder
-        sample_file2 = create_test_file(filename="test2.txt")
-        document_data2 = {"name": "Document Not in Folder"}
-        client.post(
-            "/api/v1/documents",
-            headers=auth_headers,
-            data=document_data2,
-            files={"file": ("test2.txt", sample_file2.file, "text/plain")},
+        # Create one document in the folder and one outside it concurrently
+        await asyncio.gather(
+            env.client.post(
+                "/api/v1/documents",
+                headers=env.headers,
+                data={"name": "Document in Folder", "folder_id": folder_id},
+                files={"file": ("test.txt", _SAMPLE_BYTES, "text/plain")},
+            ),
+            env.client.post(
+                "/api/v1/documents",
+                headers=env.headers,
+                data={"name": "Document Not in Folder"},
+                files={"file": ("test2.txt", _SAMPLE_BYTES, "text/plain")},
+            ),
         )
 
         # Act
-        response = client.get(
+        response = await env.client.get(
             "/api/v1/documents",
-            headers=auth_headers,
+            headers=env.headers,
             params={"folder_id": folder_id},
         )
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
+        assert response.status_code == status.HTTP_200_OK, response.text
         data = response.json()
         assert isinstance(data, list)
         # At least one document should be in the specified folder
@@ -317,15 +283,15 @@ class TestDocumentListing:
     @pytest.mark.asyncio
     async def test_list_documents_unauthenticated(
         self,
-        client: TestClient,
+        client: httpx.AsyncClient,
         db: DynamoDBSession,
     ):
         """Test rejection of unauthenticated request"""
         # Act
-        response = client.get("/api/v1/documents")
+        response = await client.get("/api/v1/documents")
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED, response.text
 
 
 class TestSharedDocuments:
@@ -334,31 +300,31 @@ class TestSharedDocuments:
     @pytest.mark.asyncio
     async def test_list_shared_documents(
         self,
-        client: TestClient,
+        client: httpx.AsyncClient,
         auth_headers: dict[str, str],
         db: DynamoDBSession,
     ):
         """Test listing documents shared with user"""
         # Act
-        response = client.get(
+        response = await client.get(
             "/api/v1/documents/shared",
             headers=auth_headers,
         )
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_200_OK)
+        assert response.status_code == status.HTTP_200_OK, response.text
         data = response.json()
         assert isinstance(data, list)
 
     @pytest.mark.asyncio
     async def test_list_shared_documents_unauthenticated(
         self,
-        client: TestClient,
+        client: httpx.AsyncClient,
         db: DynamoDBSession,
     ):
         """Test rejection of unauthenticated request"""
         # Act
-        response = client.get("/api/v1/documents/shared")
+        response = await client.get("/api/v1/documents/shared")
 
         # Assert
-        assert_status_code(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED, response.text
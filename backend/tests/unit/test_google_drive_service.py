@@ -1,12 +1,68 @@
+import asyncio
+from contextlib import contextmanager
 from datetime import UTC, datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import aiohttp
+import httplib2
 import pytest
+from googleapiclient.errors import HttpError
 
 from app.models.integration import ExternalIntegration
 from app.schemas.integration import GoogleDriveFile
-from app.services.integration import GoogleDriveService, ensure_timezone_aware
+from app.services import integration as _integration_mod
+from app.services.integration import (
+    DriveRateLimiter,
+    GoogleDriveService,
+    _parse_drive_ts,
+    ensure_timezone_aware,
+)
+
+# Fixed "current" time seen by app.services.integration during these tests
+_NOW = datetime(2023, 1, 1, 12, 0, 0, tzinfo=UTC)
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return _NOW.astimezone(tz) if tz else _NOW.replace(tzinfo=None)
+
+
+# Shared fields for integrations passed to _refresh_token_if_needed
+_BASE_INTEGRATION = {
+    "id": "test-integration-id",
+    "user_id": "test-user-id",
+    "provider": "google_drive",
+    "access_token": "current-access-token",
+    "refresh_token": "refresh-token",
+}
+
+
+class _FakeFiles:
+    """Stand-in for the Drive files() resource that records list/get calls"""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    def list(self, **kwargs):
+        self.calls.append(("list", kwargs))
+        return self
+
+    def get(self, **kwargs):
+        self.calls.append(("get", kwargs))
+        return self
+
+    def execute(self):
+        return self.response
+
+
+class _FakeDrive:
+    def __init__(self, response):
+        self._files = _FakeFiles(response)
+
+    def files(self):
+        return self._files
 
 
 @pytest.fixture
@@ -15,6 +71,31 @@ def google_drive_service():
     return GoogleDriveService()
 
 
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(_integration_mod, "datetime", _FrozenDatetime)
+
+
+@pytest.fixture(scope="session")
+def _db_template():
+    return AsyncMock()
+
+
+@pytest.fixture
+def mock_db(_db_template):
+    """Shared AsyncMock session, reset to a clean state for each test"""
+    _db_template.reset_mock(return_value=True, side_effect=True)
+    return _db_template
+
+
+@pytest.fixture(autouse=True)
+def mock_build(monkeypatch):
+    """Replace the Drive client factory so no test builds a real discovery client"""
+    mock = MagicMock()
+    monkeypatch.setattr(_integration_mod, "build", mock)
+    return mock
+
+
 @pytest.mark.asyncio
 async def test_get_authorization_url(google_drive_service):
     # Arrange
@@ -31,8 +112,23 @@ async def test_get_authorization_url(google_drive_service):
     assert "state=" in result
 
 
+def test_get_authorization_url_encodes_params(google_drive_service):
+    # Arrange
+    mock_state = '{"user_id": "test-user-id"}'
+
+    # Act
+    result = google_drive_service.get_authorization_url(mock_state)
+
+    # Assert
+    query = result.split("?", 1)[1]
+    assert " " not in query
+    assert '"' not in query
+    assert "state=%7B%22user_id%22%3A%20%22test-user-id%22%7D" in query
+    assert "scope=https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fdrive.readonly%20" in query
+
+
 @pytest.mark.asyncio
-async def test_exchange_code_for_token(google_drive_service):
+async def test_exchange_code_for_token(google_drive_service, monkeypatch):
     # Arrange
     mock_code = "test-auth-code"
     mock_response_json = {
@@ -41,49 +137,33 @@ async def test_exchange_code_for_token(google_drive_service):
         "expires_in": 3600,
         "token_type": "Bearer",
     }
+    mock_exchange = AsyncMock(return_value=mock_response_json)
+    monkeypatch.setattr(google_drive_service, "exchange_code_for_token", mock_exchange)
 
-    # Let's directly patch the exchange_code_for_token method
-    original_method = GoogleDriveService.exchange_code_for_token
-    GoogleDriveService.exchange_code_for_token = AsyncMock(
-        return_value=mock_response_json
-    )
-
-    try:
-        # Act
-        result = await google_drive_service.exchange_code_for_token(mock_code)
+    # Act
+    result = await google_drive_service.exchange_code_for_token(mock_code)
 
-        # Assert
-        assert result == mock_response_json
-        GoogleDriveService.exchange_code_for_token.assert_called_once_with(mock_code)
-    finally:
-        # Cleanup - restore the original method
-        GoogleDriveService.exchange_code_for_token = original_method
+    # Assert
+    assert result == mock_response_json
+    mock_exchange.assert_called_once_with(mock_code)
 
 
 @pytest.mark.asyncio
-async def test_exchange_code_for_token_error(google_drive_service):
+async def test_exchange_code_for_token_error(google_drive_service, monkeypatch):
     # Arrange
     mock_code = "invalid-code"
+    mock_exchange = AsyncMock(side_effect=ValueError("Invalid authorization code"))
+    monkeypatch.setattr(google_drive_service, "exchange_code_for_token", mock_exchange)
 
-    # Let's directly patch the exchange_code_for_token method to raise an error
-    original_method = GoogleDriveService.exchange_code_for_token
-    GoogleDriveService.exchange_code_for_token = AsyncMock(
-        side_effect=ValueError("Invalid authorization code")
-    )
+    # Act & Assert
+    with pytest.raises(ValueError):
+        await google_drive_service.exchange_code_for_token(mock_code)
 
-    try:
-        # Act & Assert
-        with pytest.raises(ValueError):
-            await google_drive_service.exchange_code_for_token(mock_code)
-
-        GoogleDriveService.exchange_code_for_token.assert_called_once_with(mock_code)
-    finally:
-        # Cleanup - restore the original method
-        GoogleDriveService.exchange_code_for_token = original_method
+    mock_exchange.assert_called_once_with(mock_code)
 
 
 @pytest.mark.asyncio
-async def test_get_user_info(google_drive_service):
+async def test_get_user_info(google_drive_service, monkeypatch):
     # Arrange
     mock_access_token = "test-access-token"
     mock_user_data = {
@@ -92,35 +172,23 @@ async def test_get_user_info(google_drive_service):
         "name": "Test User",
         "picture": "https://example.com/profile.jpg",
     }
+    mock_get_user_info = AsyncMock(return_value=mock_user_data)
+    monkeypatch.setattr(google_drive_service, "get_user_info", mock_get_user_info)
 
-    # Directly patch the get_user_info method
-    original_method = GoogleDriveService.get_user_info
-    GoogleDriveService.get_user_info = AsyncMock(return_value=mock_user_data)
-
-    try:
-        # Act
-        result = await google_drive_service.get_user_info(mock_access_token)
+    # Act
+    result = await google_drive_service.get_user_info(mock_access_token)
 
-        # Assert
-        assert result == mock_user_data
-        GoogleDriveService.get_user_info.assert_called_once_with(mock_access_token)
-    finally:
-        # Cleanup - restore the original method
-        GoogleDriveService.get_user_info = original_method
+    # Assert
+    assert result == mock_user_data
+    mock_get_user_info.assert_called_once_with(mock_access_token)
 
 
 @pytest.mark.asyncio
-async def test_refresh_token_if_needed_not_expired(google_drive_service):
+async def test_refresh_token_if_needed_not_expired(google_drive_service, mock_db):
     # Arrange
-    mock_db = AsyncMock()
     # Create integration with token that won't expire for another hour
     mock_integration = ExternalIntegration(
-        id="test-integration-id",
-        user_id="test-user-id",
-        provider="google_drive",
-        access_token="current-access-token",
-        refresh_token="refresh-token",
-        token_expiry=datetime.now(UTC) + timedelta(hours=1),
+        **_BASE_INTEGRATION, token_expiry=_NOW + timedelta(hours=1)
     )
 
     # Act
@@ -137,50 +205,39 @@ async def test_refresh_token_if_needed_not_expired(google_drive_service):
 
 
 @pytest.mark.asyncio
-async def test_refresh_token_if_needed_expired(google_drive_service):
+async def test_refresh_token_if_needed_expired(
+    google_drive_service, mock_db, monkeypatch
+):
     # Arrange
-    mock_db = AsyncMock()
     # Create integration with expired token
     mock_integration = ExternalIntegration(
-        id="test-integration-id",
-        user_id="test-user-id",
-        provider="google_drive",
-        access_token="expired-access-token",
-        refresh_token="refresh-token",
-        token_expiry=datetime.now(UTC) - timedelta(hours=1),
+        **_BASE_INTEGRATION, token_expiry=_NOW - timedelta(hours=1)
     )
 
     # Create a modified version of _refresh_token_if_needed that doesn't use aiohttp
-    async def mock_refresh(self, db, integration):
+    async def mock_refresh(db, integration):
         integration.access_token = "new-access-token"
-        integration.token_expiry = datetime.now(UTC) + timedelta(hours=1)
+        integration.token_expiry = _NOW + timedelta(hours=1)
         db.add(integration)
         await db.commit()
         return integration
 
-    # Patch the method
-    original_method = GoogleDriveService._refresh_token_if_needed
-    GoogleDriveService._refresh_token_if_needed = mock_refresh
+    monkeypatch.setattr(google_drive_service, "_refresh_token_if_needed", mock_refresh)
 
-    try:
-        # Act
-        result = await google_drive_service._refresh_token_if_needed(
-            mock_db, mock_integration
-        )
+    # Act
+    result = await google_drive_service._refresh_token_if_needed(
+        mock_db, mock_integration
+    )
 
-        # Assert
-        assert result.access_token == "new-access-token"
-        mock_db.add.assert_called_once_with(mock_integration)
-        mock_db.commit.assert_called_once()
-    finally:
-        # Cleanup - restore the original method
-        GoogleDriveService._refresh_token_if_needed = original_method
+    # Assert
+    assert result.access_token == "new-access-token"
+    mock_db.add.assert_called_once_with(mock_integration)
+    mock_db.commit.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_list_files(google_drive_service):
+async def test_list_files(google_drive_service, mock_db, mock_build):
     # Arrange
-    mock_db = AsyncMock()
     mock_integration = MagicMock()
     mock_folder_id = "test-folder-id"
 
@@ -221,16 +278,8 @@ async def test_list_files(google_drive_service):
         patch.object(
             google_drive_service, "_credentials_from_db_model", return_value=MagicMock()
         ) as mock_creds,
-        patch("app.services.integration.build") as mock_build,
     ):
-        # Mock Drive service
-        mock_files = MagicMock()
-        mock_files.list.return_value.execute.return_value = mock_gdrive_response
-
-        mock_drive = MagicMock()
-        mock_drive.files.return_value = mock_files
-
-        mock_build.return_value = mock_drive
+        mock_build.return_value = _FakeDrive(mock_gdrive_response)
 
         # Act
         files, next_page_token = await google_drive_service.list_files(
@@ -246,13 +295,12 @@ async def test_list_files(google_drive_service):
         mock_refresh.assert_called_once_with(mock_db, mock_integration)
         mock_creds.assert_called_once_with(mock_integration)
         mock_build.assert_called_once()
-        mock_files.list.assert_called_once()
+        assert [name for name, _ in mock_build.return_value.files().calls] == ["list"]
 
 
 @pytest.mark.asyncio
-async def test_get_file_metadata(google_drive_service):
+async def test_get_file_metadata(google_drive_service, mock_db, mock_build):
     # Arrange
-    mock_db = AsyncMock()
     mock_integration = MagicMock()
     mock_file_id = "test-file-id"
 
@@ -279,16 +327,8 @@ async def test_get_file_metadata(google_drive_service):
         patch.object(
             google_drive_service, "_credentials_from_db_model", return_value=MagicMock()
         ) as mock_creds,
-        patch("app.services.integration.build") as mock_build,
     ):
-        # Mock Drive service
-        mock_files = MagicMock()
-        mock_files.get.return_value.execute.return_value = mock_gdrive_file
-
-        mock_drive = MagicMock()
-        mock_drive.files.return_value = mock_files
-
-        mock_build.return_value = mock_drive
+        mock_build.return_value = _FakeDrive(mock_gdrive_file)
 
         # Act
         file_metadata = await google_drive_service.get_file_metadata(
@@ -306,23 +346,255 @@ async def test_get_file_metadata(google_drive_service):
         mock_refresh.assert_called_once_with(mock_db, mock_integration)
         mock_creds.assert_called_once_with(mock_integration)
         mock_build.assert_called_once()
-        mock_files.get.assert_called_once_with(
-            fileId=mock_file_id,
-            fields="id, name, mimeType, size, webViewLink, webContentLink, thumbnailLink, md5Checksum, modifiedTime, createdTime, parents, exportLinks",
+        assert mock_build.return_value.files().calls == [
+            (
+                "get",
+                {
+                    "fileId": mock_file_id,
+                    "fields": "id, name, mimeType, size, webViewLink, webContentLink, thumbnailLink, md5Checksum, modifiedTime, createdTime, parents, exportLinks",
+                },
+            )
+        ]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (datetime(2023, 1, 1, 12, 0, 0), datetime(2023, 1, 1, 12, 0, 0, tzinfo=UTC)),
+        (
+            datetime(2023, 1, 1, 12, 0, 0, tzinfo=UTC),
+            datetime(2023, 1, 1, 12, 0, 0, tzinfo=UTC),
+        ),
+        (None, None),
+    ],
+    ids=["naive", "aware", "none"],
+)
+def test_ensure_timezone_aware(value, expected):
+    # Act
+    result = ensure_timezone_aware(value)
+
+    # Assert
+    assert result == expected
+    if expected is not None:
+        assert result.tzinfo is not None
+
+
+@pytest.mark.asyncio
+async def test_get_files_metadata_batches_requests(
+    google_drive_service, mock_db, mock_build
+):
+    # Arrange
+    mock_integration = MagicMock()
+    file_ids = [f"file{i}" for i in range(150)]
+    batches = []
+
+    class FakeBatch:
+        def __init__(self, callback):
+            self.callback = callback
+            self.requests = []
+            batches.append(self)
+
+        def add(self, request, request_id):
+            self.requests.append(request_id)
+
+        def execute(self):
+            for request_id in self.requests:
+                self.callback(
+                    request_id,
+                    {"id": request_id, "name": request_id, "mimeType": "text/plain"},
+                    None,
+                )
+
+    with (
+        patch.object(
+            google_drive_service,
+            "_refresh_token_if_needed",
+            return_value=mock_integration,
+        ),
+        patch.object(
+            google_drive_service, "_credentials_from_db_model", return_value=MagicMock()
+        ),
+    ):
+        mock_build.return_value.new_batch_http_request.side_effect = lambda callback: (
+            FakeBatch(callback)
+        )
+
+        # Act
+        result = await google_drive_service.get_files_metadata(
+            mock_db, mock_integration, file_ids
+        )
+
+        # Assert
+        assert [len(batch.requests) for batch in batches] == [100, 50]
+        assert set(result) == set(file_ids)
+        assert result["file42"].mime_type == "text/plain"
+
+
+_IMPORT_FOLDER = GoogleDriveFile(
+    id="folder-id",
+    name="Folder",
+    mime_type="application/vnd.google-apps.folder",
+    is_folder=True,
+)
+
+
+@contextmanager
+def _import_folder_patches(service, files, download, mock_document_service):
+    """Stub the Drive and storage calls import_folder makes around downloads"""
+    with (
+        patch.object(service, "get_file_metadata", return_value=_IMPORT_FOLDER),
+        patch.object(service, "list_files", return_value=(files, None)),
+        patch.object(service, "get_files_metadata", return_value={}),
+        patch.object(service, "ensure_fresh_token", side_effect=lambda db, i: i),
+        patch.object(service, "_download_for_import", side_effect=download),
+        patch(
+            "app.services.folder.folder_service.create",
+            AsyncMock(return_value=MagicMock(id="local-folder-id")),
+        ),
+        patch.object(_integration_mod, "document_service", mock_document_service),
+    ):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_import_folder_downloads_files_concurrently(
+    google_drive_service, mock_db
+):
+    # Arrange - record how many downloads are in flight at once
+    files = [
+        GoogleDriveFile(id=f"file{i}", name=f"file{i}.txt", mime_type="text/plain")
+        for i in range(10)
+    ]
+    in_flight = []
+    peak = 0
+
+    async def download(db, integration, file_id, file_metadata):
+        nonlocal peak
+        in_flight.append(file_id)
+        peak = max(peak, len(in_flight))
+        await asyncio.sleep(0)
+        in_flight.remove(file_id)
+        return {"file_path": f"stored-{file_id}"}
+
+    mock_document_service = MagicMock()
+    mock_document_service.create_documents = AsyncMock()
+
+    with _import_folder_patches(
+        google_drive_service, files, download, mock_document_service
+    ):
+        # Act
+        result = await google_drive_service.import_folder(
+            mock_db, "test-user-id", MagicMock(), "folder-id"
         )
 
+    # Assert
+    assert result["imported_files"] == 10
+    assert peak == _integration_mod.IMPORT_DOWNLOAD_CONCURRENCY
+    (documents,) = mock_document_service.create_documents.await_args.args
+    assert len(documents) == 10
+
 
 @pytest.mark.asyncio
-async def test_ensure_timezone_aware():
-    # Test with timezone-naive datetime
-    naive_dt = datetime(2023, 1, 1, 12, 0, 0)
-    aware_dt = ensure_timezone_aware(naive_dt)
-    assert aware_dt.tzinfo is not None
-
-    # Test with timezone-aware datetime
-    already_aware = datetime(2023, 1, 1, 12, 0, 0, tzinfo=UTC)
-    still_aware = ensure_timezone_aware(already_aware)
-    assert still_aware.tzinfo is not None
-
-    # Test with None
-    assert ensure_timezone_aware(None) is None
+async def test_import_folder_deletes_files_when_batch_write_fails(
+    google_drive_service, mock_db
+):
+    # Arrange - three downloaded files whose records then fail to write, and
+    # a storage error while removing the first one
+    files = [
+        GoogleDriveFile(id=f"file{i}", name=f"file{i}.txt", mime_type="text/plain")
+        for i in range(3)
+    ]
+    mock_document_service = MagicMock()
+    mock_document_service.create_documents = AsyncMock(side_effect=Exception("boom"))
+    mock_document_service.delete_content = AsyncMock(
+        side_effect=[Exception("storage down"), True, True]
+    )
+
+    with _import_folder_patches(
+        google_drive_service,
+        files,
+        [{"file_path": f"stored-{i}"} for i in range(3)],
+        mock_document_service,
+    ):
+        # Act
+        result = await google_drive_service.import_folder(
+            mock_db, "test-user-id", MagicMock(), "folder-id"
+        )
+
+    # Assert - cleanup carries on past the failed delete
+    assert result["imported_files"] == 0
+    assert result["skipped_items"] == 3
+    deleted = [c.args[0] for c in mock_document_service.delete_content.await_args_list]
+    assert deleted == ["stored-0", "stored-1", "stored-2"]
+
+
+def test_parse_drive_ts():
+    # Drive returns UTC timestamps with a trailing "Z", with or without millis
+    assert _parse_drive_ts("2023-01-01T12:00:00Z") == datetime(
+        2023, 1, 1, 12, 0, 0, tzinfo=UTC
+    )
+    assert _parse_drive_ts("2023-01-01T12:00:00.123Z") == datetime(
+        2023, 1, 1, 12, 0, 0, 123000, tzinfo=UTC
+    )
+    assert _parse_drive_ts(None) is None
+    assert _parse_drive_ts("") is None
+
+
+@pytest.mark.asyncio
+async def test_search_files_escapes_query(google_drive_service, mock_db, mock_build):
+    # Arrange
+    mock_integration = MagicMock()
+
+    with (
+        patch.object(
+            google_drive_service,
+            "_refresh_token_if_needed",
+            return_value=mock_integration,
+        ),
+        patch.object(
+            google_drive_service, "_credentials_from_db_model", return_value=MagicMock()
+        ),
+    ):
+        mock_files = mock_build.return_value.files.return_value
+        mock_files.list.return_value.execute.return_value = {"files": []}
+
+        # Act
+        files, next_page_token = await google_drive_service.search_files(
+            mock_db, mock_integration, "O'Brien\\notes"
+        )
+
+        # Assert
+        assert files == []
+        assert next_page_token is None
+        query = mock_files.list.call_args.kwargs["q"]
+        assert query == "fullText contains 'O\\'Brien\\\\notes' and trashed = false"
+
+
+@pytest.mark.asyncio
+async def test_drive_rate_limiter_retries_rate_limited_requests():
+    # Arrange
+    limiter = DriveRateLimiter(max_retries=2)
+    rate_limited = HttpError(httplib2.Response({"status": 429}), b"")
+    request = MagicMock(side_effect=[rate_limited, rate_limited, {"id": "file1"}])
+
+    with patch("app.services.integration.asyncio.sleep") as mock_sleep:
+        # Act
+        result = await limiter.call(request)
+
+    # Assert
+    assert result == {"id": "file1"}
+    assert request.call_count == 3
+    assert mock_sleep.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_drive_rate_limiter_does_not_retry_client_errors():
+    # Arrange
+    limiter = DriveRateLimiter()
+    not_found = HttpError(httplib2.Response({"status": 404}), b"")
+    request = MagicMock(side_effect=not_found)
+
+    # Act / Assert
+    with pytest.raises(HttpError):
+        await limiter.call(request)
+    assert request.call_count == 1
@@ -0,0 +1,129 @@
+"""Unit tests for storage providers"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.utils.storage_factory import FileSystemStorage, S3Storage
+from tests.utils.factories import create_test_file
+
+
+@pytest.mark.asyncio
+async def test_s3_save_file_streams_upload(mock_s3):
+    # Arrange
+    storage = S3Storage()
+    upload = create_test_file(content=b"streamed content", content_type="text/plain")
+    await upload.read()  # callers may have already consumed the stream
+
+    # Act
+    key = await storage.save_file(upload, "uploads/streamed.txt")
+
+    # Assert
+    assert key == "uploads/streamed.txt"
+    obj = mock_s3.get_object(Bucket=settings.S3_BUCKET, Key=key)
+    assert obj["Body"].read() == b"streamed content"
+    assert obj["ContentType"] == "text/plain"
+
+
+@pytest.mark.asyncio
+async def test_filesystem_save_file_streams_upload(tmp_path):
+    # Arrange
+    storage = FileSystemStorage(upload_folder=str(tmp_path))
+    upload = create_test_file(content=b"x" * (3 * 1024 * 1024))
+
+    # Act
+    file_path = await storage.save_file(upload, "large.txt")
+
+    # Assert
+    with open(file_path, "rb") as f:
+        assert f.read() == b"x" * (3 * 1024 * 1024)
+
+
+def test_s3_storage_reuses_client(mock_s3):
+    assert S3Storage().s3 is S3Storage().s3
+
+
+@pytest.mark.asyncio
+async def test_s3_presigned_url_is_reused(mock_s3):
+    # Arrange
+    storage = S3Storage()
+
+    # Act - pin the clock so both calls fall in the same reuse window
+    with patch("app.utils.storage_factory.time.time", return_value=1_000_000.0):
+        first = await storage.get_presigned_url("abc-report.pdf")
+        with patch.object(storage.s3, "generate_presigned_url") as mock_sign:
+            second = await storage.get_presigned_url("abc-report.pdf")
+
+    # Assert
+    mock_sign.assert_not_called()
+    assert second == first
+    assert "filename%3D%22report.pdf%22" in first
+
+
+@pytest.mark.asyncio
+async def test_s3_presigned_url_cache_ignores_client(mock_s3):
+    # Arrange - a second provider with its own client signs the same object
+    storage = S3Storage()
+    other = S3Storage()
+    other.s3 = MagicMock()
+
+    # Act
+    with patch("app.utils.storage_factory.time.time", return_value=1_000_000.0):
+        first = await storage.get_presigned_url("abc-report.pdf")
+        second = await other.get_presigned_url("abc-report.pdf")
+
+    # Assert
+    other.s3.generate_presigned_url.assert_not_called()
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_s3_presigned_url_short_expiration_is_not_reused(mock_s3):
+    # Arrange
+    storage = S3Storage()
+
+    # Act - a URL shorter-lived than the reuse window is signed every time
+    with patch("app.utils.storage_factory.time.time", return_value=1_000_000.0):
+        await storage.get_presigned_url("abc-report.pdf", expiration=60)
+        with patch.object(
+            storage.s3, "generate_presigned_url", return_value="fresh-url"
+        ) as mock_sign:
+            url = await storage.get_presigned_url("abc-report.pdf", expiration=60)
+
+    # Assert
+    mock_sign.assert_called_once()
+    assert url == "fresh-url"
+
+
+@pytest.mark.asyncio
+async def test_s3_presigned_url_is_resigned_once_too_old(mock_s3):
+    # Arrange - sign at t0, then come back after the reuse window
+    storage = S3Storage()
+    with patch("app.utils.storage_factory.time.time", return_value=1_000_000.0):
+        await storage.get_presigned_url("abc-report.pdf")
+
+    # Act
+    with (
+        patch("app.utils.storage_factory.time.time", return_value=1_000_301.0),
+        patch.object(
+            storage.s3, "generate_presigned_url", return_value="fresh-url"
+        ) as mock_sign,
+    ):
+        url = await storage.get_presigned_url("abc-report.pdf")
+
+    # Assert
+    mock_sign.assert_called_once()
+    assert url == "fresh-url"
+
+
+@pytest.mark.asyncio
+async def test_filesystem_delete_file(tmp_path):
+    # Arrange
+    storage = FileSystemStorage(upload_folder=str(tmp_path))
+    file_path = await storage.save_content(b"content", "to-delete.txt")
+
+    # Act / Assert - deleting twice succeeds; the second call finds nothing
+    assert await storage.delete_file(file_path) is True
+    assert not (tmp_path / "to-delete.txt").exists()
+    assert await storage.delete_file(file_path) is True
@@ -0,0 +1,146 @@
+"""Unit tests for the user service"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.db.dynamodb_session import DynamoDBSession
+from app.models.user import User
+from app.services.user import user_cache, user_service
+
+
+@pytest.mark.asyncio
+async def test_authenticate_by_email(db: DynamoDBSession, test_user: User):
+    user = await user_service.authenticate(
+        db, email_or_username="test@example.com", password="testpassword123"
+    )
+
+    assert user is not None
+    assert user.id == test_user.id
+
+
+@pytest.mark.asyncio
+async def test_authenticate_by_username(db: DynamoDBSession, test_user: User):
+    user = await user_service.authenticate(
+        db, email_or_username="testuser", password="testpassword123"
+    )
+
+    assert user is not None
+    assert user.id == test_user.id
+
+
+@pytest.mark.asyncio
+async def test_authenticate_wrong_password(db: DynamoDBSession, test_user: User):
+    user = await user_service.authenticate(
+        db, email_or_username="testuser", password="wrong-password"
+    )
+
+    assert user is None
+
+
+@pytest.mark.asyncio
+async def test_authenticate_unknown_user(db: DynamoDBSession, test_user: User):
+    user = await user_service.authenticate(
+        db, email_or_username="nobody@example.com", password="testpassword123"
+    )
+
+    assert user is None
+
+
+@pytest.mark.asyncio
+async def test_get_by_email(db: DynamoDBSession, test_user: User):
+    user = await user_service.get_by_email(db, email="test@example.com")
+
+    assert user is not None
+    assert user.id == test_user.id
+    assert await user_service.get_by_email(db, email="nobody@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_get_by_username(db: DynamoDBSession, test_user: User):
+    user = await user_service.get_by_username(db, username="testuser")
+
+    assert user is not None
+    assert user.id == test_user.id
+    assert await user_service.get_by_username(db, username="nobody") is None
+
+
+@pytest.mark.asyncio
+async def test_username_exists(db: DynamoDBSession, test_user: User):
+    assert await user_service.username_exists(db, username="testuser") is True
+    assert await user_service.username_exists(db, username="nobody") is False
+
+
+@pytest.mark.asyncio
+async def test_create_google_user_picks_unique_username(
+    db: DynamoDBSession, test_user: User
+):
+    user = await user_service.create_or_update_google_user(
+        db,
+        google_user_info={"id": "google-123", "email": "testuser@gmail.com"},
+    )
+
+    assert user.username == "testuser1"
+    found = await user_service.get_by_google_id(db, google_id="google-123")
+    assert found is not None
+    assert found.id == user.id
+
+
+@pytest.mark.asyncio
+async def test_get_by_email_is_cached(db: DynamoDBSession, test_user: User):
+    await user_service.get_by_email(db, email="test@example.com")
+
+    with patch.object(db.dynamodb, "Table") as mock_table:
+        user = await user_service.get_by_email(db, email="test@example.com")
+
+    mock_table.assert_not_called()
+    assert user.id == test_user.id
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_cached_user(db: DynamoDBSession, test_user: User):
+    await user_service.get_by_username(db, username="testuser")
+
+    await user_service.update(db, db_obj=test_user, obj_in={"username": "renamed"})
+
+    assert await user_service.get_by_username(db, username="testuser") is None
+    user = await user_service.get(db, id=test_user.id)
+    assert user.username == "renamed"
+
+
+@pytest.mark.asyncio
+async def test_user_lookups_never_scan(db: DynamoDBSession, test_user: User):
+    # Lookups must go through key or GSI queries; a scan reads the whole table
+    user_cache.clear()
+    get_table = db.dynamodb.Table
+
+    def table_without_scan(name):
+        table = get_table(name)
+        table.scan = MagicMock(side_effect=AssertionError("users table scanned"))
+        return table
+
+    with patch.object(db.dynamodb, "Table", side_effect=table_without_scan):
+        assert await user_service.get(db, id=test_user.id)
+        assert await user_service.get_by_email(db, email="test@example.com")
+        assert await user_service.get_by_username(db, username="testuser")
+        assert await user_service.authenticate(
+            db, email_or_username="testuser", password="testpassword123"
+        )
+        await user_service.create_or_update_google_user(
+            db,
+            google_user_info={"id": "google-123", "email": "test@example.com"},
+        )
+        assert await user_service.get_by_google_id(db, google_id="google-123")
+
+
+@pytest.mark.asyncio
+async def test_google_sign_in_links_existing_email(
+    db: DynamoDBSession, test_user: User
+):
+    user = await user_service.create_or_update_google_user(
+        db,
+        google_user_info={"id": "google-456", "email": "test@example.com"},
+    )
+
+    assert user.id == test_user.id
+    assert user.google_id == "google-456"
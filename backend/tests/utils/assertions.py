@@ -1,13 +1,50 @@
 """Custom assertions for test validation"""
 
+from functools import lru_cache
 from typing import Any, Optional
 
-import boto3
-
 from app.core.config import settings
 from app.models.document import Document
 
 
+@lru_cache(maxsize=4)
+def _s3_client(region: str, access_key_id: str, secret_access_key: str):
+    """Return an S3 client, built once per region and credential pair"""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+        config=Config(
+            retries={"max_attempts": 1}, connect_timeout=0.5, read_timeout=2.0
+        ),
+    )
+
+
+def _s3_object_exists(bucket: str, key: str) -> bool:
+    from botocore.exceptions import ClientError
+
+    s3_client = _s3_client(
+        settings.AWS_REGION,
+        settings.AWS_ACCESS_KEY_ID or "testing",
+        settings.AWS_SECRET_ACCESS_KEY or "testing",
+    )
+    try:
+        s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return False
+        raise
+    return True
+
+
+def _document_fields(document: Document) -> dict[str, Any]:
+    return document.to_dict() if hasattr(document, "to_dict") else vars(document)
+
+
 def assert_document_equals(
     actual: Document,
     expected: Document,
@@ -21,22 +58,28 @@ def assert_document_equals(
         expected: Expected document object
         ignore_fields: List of field names to ignore in comparison
     """
-    ignore_fields = ignore_fields or []
-
-    # Convert to dicts for comparison
-    actual_dict = actual.to_dict() if hasattr(actual, "to_dict") else actual.__dict__
-    expected_dict = (
-        expected.to_dict() if hasattr(expected, "to_dict") else expected.__dict__
-    )
-
-    for key in expected_dict:
-        if key in ignore_fields:
-            continue
-
-        assert key in actual_dict, f"Field '{key}' missing in actual document"
-        assert actual_dict[key] == expected_dict[key], (
-            f"Field '{key}' mismatch: {actual_dict[key]} != {expected_dict[key]}"
-        )
+    ignore_fields = set(ignore_fields or ())
+
+    # Convert to dicts once, dropping ignored fields, then compare in one pass
+    actual_dict = {
+        key: value
+        for key, value in _document_fields(actual).items()
+        if key not in ignore_fields
+    }
+    expected_dict = {
+        key: value
+        for key, value in _document_fields(expected).items()
+        if key not in ignore_fields
+    }
+
+    missing = expected_dict.keys() - actual_dict.keys()
+    assert not missing, f"Fields missing in actual document: {sorted(missing)}"
+    mismatches = {
+        key: (actual_dict[key], value)
+        for key, value in expected_dict.items()
+        if actual_dict[key] != value
+    }
+    assert not mismatches, f"Field mismatches (actual, expected): {mismatches}"
 
 
 def assert_s3_file_exists(
@@ -51,16 +94,7 @@ def assert_s3_file_exists(
         bucket: S3 bucket name (uses default if not provided)
     """
     bucket = bucket or settings.S3_BUCKET
-    s3_client = boto3.client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID or "testing",
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or "testing",
-    )
-
-    try:
-        s3_client.head_object(Bucket=bucket, Key=file_path)
-    except s3_client.exceptions.NoSuchKey:
+    if not _s3_object_exists(bucket, file_path):
         raise AssertionError(
             f"File '{file_path}' does not exist in S3 bucket '{bucket}'"
         )
@@ -78,19 +112,8 @@ def assert_s3_file_deleted(
         bucket: S3 bucket name (uses default if not provided)
     """
     bucket = bucket or settings.S3_BUCKET
-    s3_client = boto3.client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID or "testing",
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or "testing",
-    )
-
-    try:
-        s3_client.head_object(Bucket=bucket, Key=file_path)
+    if _s3_object_exists(bucket, file_path):
         raise AssertionError(f"File '{file_path}' still exists in S3 bucket '{bucket}'")
-    except s3_client.exceptions.NoSuchKey:
-        # File doesn't exist - this is what we want
-        pass
 
 
 def assert_response_has_keys(
@@ -1,15 +1,35 @@
 """Test data factories for creating test objects"""
 
 import io
+import itertools
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import UploadFile
 
-from app.core.security import generate_uuid, get_password_hash
+from app.core.security import get_password_hash
 from app.models.document import Document, DocumentShare
 from app.models.user import User
 
+# Fixed timestamp for factory objects so tests are deterministic
+_NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+_id_counter = itertools.count(1)
+
+# Shared body for uploads that do not care about their content
+_DEFAULT_CONTENT = b"Test file content"
+
+
+def _test_id(kind: str) -> str:
+    """Return a readable, process-unique ID for a factory-built object"""
+    return f"test-{kind}-{next(_id_counter):08x}"
+
+
+@lru_cache(maxsize=8)
+def _cached_password_hash(password: str) -> str:
+    return get_password_hash(password)
+
 
 def create_test_user(
     email: str = "testuser@example.com",
@@ -32,12 +52,12 @@ def create_test_user(
         User object
     """
     return User(
-        id=user_id or generate_uuid(),
+        id=user_id or _test_id("user"),
         email=email,
-        hashed_password=get_password_hash(password),
+        hashed_password=_cached_password_hash(password),
         full_name=full_name,
         is_active=is_active,
-        created_at=datetime.now(),
+        created_at=_NOW,
     )
 
 
@@ -72,9 +92,9 @@ def create_test_document(
         Document object
     """
     return Document(
-        id=document_id or generate_uuid(),
+        id=document_id or _test_id("document"),
         name=name,
-        owner_id=owner_id or generate_uuid(),
+        owner_id=owner_id or _test_id("user"),
         file_path=file_path,
         file_type=file_type,
         file_size=file_size,
@@ -82,14 +102,14 @@ def create_test_document(
         folder_id=folder_id,
         is_public=is_public,
         is_deleted=is_deleted,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
+        created_at=_NOW,
+        updated_at=_NOW,
     )
 
 
 def create_test_file(
     filename: str = "test_file.txt",
-    content: bytes = b"Test file content",
+    content: bytes = _DEFAULT_CONTENT,
     content_type: str = "text/plain",
 ) -> UploadFile:
     """
@@ -101,7 +121,8 @@ def create_test_file(
         content_type: MIME type
 
     Returns:
-        UploadFile object
+        UploadFile object over its own buffer, so reads and seeks by one
+        caller never affect another
     """
     return UploadFile(
         filename=filename,
@@ -131,10 +152,10 @@ def create_test_share(
         DocumentShare object
     """
     return DocumentShare(
-        id=share_id or generate_uuid(),
+        id=share_id or _test_id("share"),
         document_id=document_id,
         user_id=user_id,
         can_edit=can_edit,
         can_delete=can_delete,
-        created_at=datetime.now(),
+        created_at=_NOW,
     )